@@ -0,0 +1,38 @@
+from sqlalchemy import update
+
+from admin.image_pipeline import store_product_image
+from admin.storage import get_storage
+from admin_model import Product
+from database import get_async_session_factory
+from jobs import enqueue, job_handler
+from response_cache import catalog_cache
+
+PRODUCT_IMAGE_JOB = "product_image"
+
+
+def enqueue_product_image(db, product_id: int, data: bytes):
+    # The upload itself travels with the job, so a restart can still process it
+    return enqueue(db, PRODUCT_IMAGE_JOB, {"product_id": product_id}, data=data)
+
+
+async def set_image_status(product_id: int, **values) -> None:
+    async with get_async_session_factory()() as db:
+        await db.execute(
+            update(Product)
+            .filter(Product.id == product_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+    catalog_cache.invalidate()
+
+
+async def mark_image_failed(payload: dict, error: Exception) -> None:
+    await set_image_status(payload["product_id"], image_status="failed")
+
+
+@job_handler(PRODUCT_IMAGE_JOB, on_failure=mark_image_failed)
+async def process_product_image(payload: dict, data: bytes) -> None:
+    # Content-addressed upload: a rerun after a lost lease finds the files and skips the work
+    image_url, _ = await store_product_image(data, get_storage())
+    await set_image_status(payload["product_id"], image_url=image_url, image_status="ready")
@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from admin.storage import StorageBackend
+
+# Variant name -> max width; the bounding box is portrait 3:4 (width x 4/3 width), so
+# wide images are limited by the width and tall ones by a height of 4/3 the width
+VARIANT_WIDTHS = {"thumb": 200, "list": 400, "detail": 800}
+FORMATS = {"jpg": ("JPEG", "image/jpeg"), "webp": ("WEBP", "image/webp")}
+QUALITY = 75  # 75% quality for optimization
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", str(min(2, os.cpu_count() or 1))))
+
+_executor = None
+# content hash -> task rendering/uploading it, so concurrent duplicate uploads share the work
+_in_flight: dict[str, asyncio.Task] = {}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    # Created on first upload so workers that never handle images never fork
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _executor
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def blob_name(content_hash: str, variant: str, ext: str) -> str:
+    return f"product_images/{content_hash}/{variant}.{ext}"
+
+
+def thumbnail_url(image_url: str | None) -> str | None:
+    """URL of the thumb JPEG stored next to a detail image; other URLs come back unchanged."""
+    if image_url and image_url.endswith("/detail.jpg"):
+        return image_url[:-len("detail.jpg")] + "thumb.jpg"
+    return image_url or None
+
+
+def render_variants(data: bytes) -> dict:
+    """Decode once and encode every variant. Runs in a worker process."""
+    from PIL import Image
+
+    largest = max(VARIANT_WIDTHS.values())
+    image = Image.open(BytesIO(data))
+    # JPEG draft mode lets libjpeg decode straight at 1/2, 1/4 or 1/8 scale
+    image.draft("RGB", (largest, int((4 / 3) * largest)))
+    image = image.convert("RGB")
+
+    variants = {}
+    # Largest first so each smaller size is resized from an already reduced image
+    for variant, width in sorted(VARIANT_WIDTHS.items(), key=lambda item: -item[1]):
+        image.thumbnail((width, int((4 / 3) * width)))
+        for ext, (pil_format, _) in FORMATS.items():
+            buffer = BytesIO()
+            image.save(buffer, format=pil_format, quality=QUALITY)
+            variants[(variant, ext)] = buffer.getvalue()
+    return variants
+
+
+def variant_urls(storage: StorageBackend, content_hash: str) -> dict:
+    return {
+        f"{variant}_{ext}": storage.public_url(blob_name(content_hash, variant, ext))
+        for variant in VARIANT_WIDTHS
+        for ext in FORMATS
+    }
+
+
+async def store_product_image(data: bytes, storage: StorageBackend) -> tuple[str, dict]:
+    """Render and upload all variants of an image, skipping work for known content.
+
+    Returns the detail JPEG URL (what Product.image_url stores) and every variant URL.
+    """
+    content_hash = hashlib.sha256(data).hexdigest()
+    marker = blob_name(content_hash, "detail", "jpg")
+
+    task = _in_flight.get(content_hash)
+    if task is None:
+        task = asyncio.ensure_future(_render_and_upload(data, content_hash, marker, storage))
+        _in_flight[content_hash] = task
+        task.add_done_callback(lambda _: _in_flight.pop(content_hash, None))
+    await asyncio.shield(task)
+
+    return storage.public_url(marker), variant_urls(storage, content_hash)
+
+
+async def _render_and_upload(data: bytes, content_hash: str, marker: str, storage: StorageBackend):
+    if await asyncio.to_thread(storage.exists, marker):
+        return
+
+    loop = asyncio.get_running_loop()
+    variants = await loop.run_in_executor(_get_executor(), render_variants, data)
+
+    uploads = [
+        asyncio.to_thread(storage.upload, blob_name(content_hash, variant, ext), body, FORMATS[ext][1])
+        for (variant, ext), body in variants.items()
+        if (variant, ext) != ("detail", "jpg")
+    ]
+    await asyncio.gather(*uploads)
+    # The detail JPEG goes last: its presence marks the whole set as complete
+    await asyncio.to_thread(storage.upload, marker, variants[("detail", "jpg")], "image/jpeg")
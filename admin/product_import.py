@@ -0,0 +1,198 @@
+"""Streaming product import shared by POST /products/import and scripts/import_products.py.
+
+Input arrives as an async stream of text lines (CSV with a header row, or
+JSONL). Rows are validated against the set of category ids, loaded once, and
+buffered into fixed-size batches. Each batch goes in with one COPY (asyncpg)
+or one executemany. If a batch fails, it is retried row by row so only the
+offending rows are reported. Memory use is bounded by the batch size and the
+error cap, whatever the size of the file.
+"""
+import codecs
+import csv
+import json
+import logging
+import math
+from typing import AsyncIterator, Literal
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from admin_model import Category, Product
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+COLUMNS = ("name", "description", "price", "image_url", "category_id")
+
+ImportFormat = Literal["csv", "jsonl"]
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []  # first MAX_REPORTED_ERRORS of {"line", "error"}
+
+    def add_error(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+async def decode_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Turn a byte stream into text lines without holding more than one line."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def csv_records(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, dict]]:
+    header = None
+    record, start_line, line_no = "", 0, 0
+    async for line in lines:
+        line_no += 1
+        if not record:
+            start_line = line_no
+        record += line
+        # A quoted field may contain newlines: wait until the quotes balance
+        if record.count('"') % 2:
+            continue
+        fields = next(csv.reader([record]), [])
+        record = ""
+        if not any(field.strip() for field in fields):
+            continue
+        if header is None:
+            header = [field.strip().lower() for field in fields]
+            continue
+        yield start_line, dict(zip(header, fields))
+    if record:
+        yield start_line, {"_error": "unterminated quoted field"}
+
+
+async def jsonl_records(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, dict]]:
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError as error:
+            yield line_no, {"_error": f"invalid JSON: {error}"}
+            continue
+        yield line_no, value if isinstance(value, dict) else {"_error": "expected a JSON object"}
+
+
+def validate_row(raw: dict, category_ids: set) -> dict:
+    """Return a Product insert row, or raise ValueError with a readable message."""
+    if "_error" in raw:
+        raise ValueError(raw["_error"])
+
+    name = str(raw.get("name") or "").strip()
+    if not name:
+        raise ValueError("name is required")
+    try:
+        price = float(raw.get("price"))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid price {raw.get('price')!r}")
+    # float() accepts "nan" and "inf", and JSON NaN / Infinity parse to them too
+    if not math.isfinite(price):
+        raise ValueError(f"invalid price {raw.get('price')!r}")
+    if price < 0:
+        raise ValueError("price must be >= 0")
+    try:
+        category_id = int(raw.get("category_id"))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid category_id {raw.get('category_id')!r}")
+    if category_id not in category_ids:
+        raise ValueError(f"category {category_id} does not exist")
+
+    return {
+        "name": name,
+        "description": (str(raw["description"]) if raw.get("description") not in (None, "") else None),
+        "price": price,
+        "image_url": (str(raw["image_url"]) if raw.get("image_url") not in (None, "") else None),
+        "category_id": category_id,
+    }
+
+
+async def _copy_rows(db: AsyncSession, rows: list) -> None:
+    # asyncpg's binary COPY is several times faster than multi-row INSERTs
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        Product.__tablename__,
+        records=[tuple(row[column] for column in COLUMNS) for row in rows],
+        columns=list(COLUMNS),
+    )
+
+
+async def _insert_batch(db: AsyncSession, batch: list, report: ImportReport, use_copy: bool) -> None:
+    rows = [row for _, row in batch]
+    try:
+        if use_copy:
+            await _copy_rows(db, rows)
+        else:
+            await db.execute(insert(Product), rows)
+        await db.commit()
+        report.inserted += len(rows)
+        return
+    except SQLAlchemyError:
+        await db.rollback()
+        logger.warning("Import batch failed, retrying row by row", exc_info=True)
+
+    for line, row in batch:
+        try:
+            await db.execute(insert(Product), [row])
+            await db.commit()
+            report.inserted += 1
+        except SQLAlchemyError as error:
+            await db.rollback()
+            report.add_error(line, str(error.orig if hasattr(error, "orig") else error).splitlines()[0])
+
+
+async def import_products(
+    lines: AsyncIterator[str],
+    fmt: ImportFormat,
+    db: AsyncSession,
+    batch_size: int = BATCH_SIZE,
+) -> ImportReport:
+    report = ImportReport()
+    category_ids = set((await db.execute(select(Category.id))).scalars())
+    use_copy = db.bind.dialect.name == "postgresql" and db.bind.dialect.driver == "asyncpg"
+    records = csv_records(lines) if fmt == "csv" else jsonl_records(lines)
+
+    batch = []
+    async for line, raw in records:
+        report.rows += 1
+        try:
+            batch.append((line, validate_row(raw, category_ids)))
+        except ValueError as error:
+            report.add_error(line, str(error))
+            continue
+        if len(batch) >= batch_size:
+            await _insert_batch(db, batch, report, use_copy)
+            batch = []
+    if batch:
+        await _insert_batch(db, batch, report, use_copy)
+
+    return report
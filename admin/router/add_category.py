@@ -1,12 +1,15 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from starlette import status
 
-from admin.schemas.category_schema import CategoryCreate, CategoryResponse
-from admin_model import Category
+from admin.image_pipeline import thumbnail_url
+from admin.schemas.category_schema import CategoryBrowseResponse, CategoryCreate, CategoryResponse
+from admin_model import Category, Product
 from database import get_db
+from response_cache import catalog_cache
 from router.auth import check_admin  # Import admin authentication
 
 router = APIRouter(prefix="/categories", tags=["Category"])
@@ -31,18 +34,90 @@ def create_category(
     db.add(new_category)
     db.commit()
     db.refresh(new_category)
+    catalog_cache.invalidate()
     return {"message": "Category Added Successfully", "category": new_category}
 
 @router.get("/", response_model=dict)  # Define the response model as dict
-def get_categories(db: Session = Depends(get_db)):
+def get_categories(request: Request, db: Session = Depends(get_db)):
+    # Served from the catalog cache until an admin adds a category or product.
+    # Misses read the primary: a lagging replica's answer would be cached under the new version
+    version = catalog_cache.version
+    cached = catalog_cache.lookup("categories")
+    if cached:
+        return cached.to_response(request)
+
+    # No categories yet is an empty list, not an error
     categories = db.query(Category).all()
-    if not categories:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No categories found"
-        )
 
     # Use CategoryResponse to serialize the list of categories
     categories_response = [CategoryResponse.model_validate(category) for category in categories]
 
-    return {"categories": categories_response}
+    return catalog_cache.store("categories", version, {"categories": categories_response}).to_response(request)
+
+
+@router.get("/browse", response_model=CategoryBrowseResponse)
+def browse_categories(
+    request: Request,
+    per_category: int = Query(8, ge=0, le=50, description="Products to embed per category"),
+    db: Session = Depends(get_db)  # Primary, like get_categories: the result is cached
+):
+    """Every category with its product count and first products, for the home screen."""
+    cache_key = ("categories_browse", per_category)
+    version = catalog_cache.version
+    cached = catalog_cache.lookup(cache_key)
+    if cached:
+        return cached.to_response(request)
+
+    # Rank and count products within each category in one pass; the
+    # (category_id, id) index supplies the rows already in partition order
+    ranked = select(
+        Product.id,
+        Product.name,
+        Product.price,
+        Product.image_url,
+        Product.category_id,
+        func.row_number().over(partition_by=Product.category_id, order_by=Product.id).label("rank"),
+        func.count().over(partition_by=Product.category_id).label("product_count")
+    ).subquery()
+
+    # Outer join so categories without products still come back, with a count of 0.
+    # The join condition keeps one row per category even when per_category is 0
+    rows = db.execute(
+        select(
+            Category.id,
+            Category.name,
+            Category.description,
+            Category.image_url,
+            ranked.c.product_count,
+            ranked.c.rank,
+            ranked.c.id.label("product_id"),
+            ranked.c.name.label("product_name"),
+            ranked.c.price.label("product_price"),
+            ranked.c.image_url.label("product_image_url")
+        )
+        .outerjoin(ranked, (ranked.c.category_id == Category.id) & (ranked.c.rank <= max(per_category, 1)))
+        .order_by(Category.id, ranked.c.rank)
+    ).all()
+
+    categories = {}
+    for row in rows:
+        category = categories.get(row.id)
+        if category is None:
+            category = categories[row.id] = {
+                "id": row.id,
+                "name": row.name,
+                "description": row.description,
+                "image_url": row.image_url,
+                "product_count": row.product_count or 0,
+                "products": []
+            }
+        if row.product_id is not None and row.rank <= per_category:
+            category["products"].append({
+                "id": row.product_id,
+                "name": row.product_name,
+                "price": row.product_price,
+                "image_url": row.product_image_url or None,
+                "thumbnail_url": thumbnail_url(row.product_image_url)
+            })
+
+    return catalog_cache.store(cache_key, version, {"categories": list(categories.values())}).to_response(request)
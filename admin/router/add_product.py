@@ -1,78 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Form, UploadFile, File
-from sqlalchemy.orm import Session
-import os
-import firebase_admin
-from firebase_admin import credentials, storage
-from admin.schemas.add_product_schema import ProductCreate, ProductsResponse
+from typing import Literal, Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException, status, Form, UploadFile, File, Query, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, load_only
+import logging
+import jobs
+from admin.image_jobs import enqueue_product_image
+from admin.image_pipeline import thumbnail_url
+from admin.schemas.add_product_schema import ProductCreate, ProductPage, ProductsResponse, SparseProduct
 from admin_model import Product, Category  # Ensure Category model is imported
-from database import get_db
+from catalog_snapshot import CURSOR_SIZES, catalog_item, get_snapshot
+from database import get_async_db, get_async_read_db, get_db
+from fieldsets import sparse_fieldset
 from models import Cart
-from router.auth import check_admin, get_current_user  # Import JWT auth dependency
-from PIL import Image
-from io import BytesIO
-
-# Load Firebase credentials from environment variables
-
-# Initialize Firebase (Ensure it's only initialized once)
-firebase_credentials = {
-    "type": "service_account",
-    "project_id": os.getenv('FIREBASE_PROJECT_ID'),
-    "private_key_id": os.getenv('FIREBASE_PRIVATE_KEY_ID'),
-    "private_key": os.getenv('FIREBASE_PRIVATE_KEY').replace("\\n", "\n"),
-    "client_email": os.getenv('FIREBASE_CLIENT_EMAIL'),
-    "client_id": os.getenv('FIREBASE_CLIENT_ID'),
-    "auth_uri": os.getenv('FIREBASE_AUTH_URI'),
-    "token_uri": os.getenv('FIREBASE_TOKEN_URI'),
-    "auth_provider_x509_cert_url": os.getenv('FIREBASE_AUTH_PROVIDER_X509_CERT_URL'),
-    "client_x509_cert_url": os.getenv('FIREBASE_CLIENT_X509_CERT_URL'),
-}
+from pagination import decode_cursor, encode_cursor
+from product_search import search_matches
+from response_cache import catalog_cache
+from router.auth import check_admin, get_current_user_async  # Import JWT auth dependency
 
-try:
-    # Initialize Firebase Admin SDK
-    cred = credentials.Certificate(firebase_credentials)
-    firebase_admin.initialize_app(cred)  # Correct bucket domain
-except Exception as e:
-    print(f"❌ Firebase initialization failed: {e}")
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
 
-from PIL import Image
-from io import BytesIO
-from fastapi import UploadFile, HTTPException
-
-def compress_image(image_file: UploadFile) -> BytesIO:
-    """Compress image while maintaining a 4:3 aspect ratio"""
-    try:
-        image = Image.open(image_file.file)
-        image = image.convert("RGB")
-
-        # Target width & height maintaining 4:3 aspect ratio
-        target_width = 800
-        target_height = int((4 / 3) * target_width)  # Ensures correct ratio (800x600)
-
-        # Resize while maintaining aspect ratio
-        image.thumbnail((target_width, target_height))
-
-        # Save compressed image
-        img_byte_arr = BytesIO()
-        image.save(img_byte_arr, format="JPEG", quality=75)  # 75% quality for optimization
-        img_byte_arr.seek(0)  # Reset stream position
-
-        return img_byte_arr
-    except Exception as error:
-        raise HTTPException(status_code=500, detail=f"Error compressing image: {str(error)}")
-
-
-
 @router.post("/")
 async def create_product(
         name: str = Form(...),
         description: str = Form(...),
         price: float = Form(...),
         category_id: int = Form(...),
+        stock: Optional[int] = Form(None, ge=0),  # Leave out to sell without tracking stock
         image_file: UploadFile = File(None),  # Image is optional
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         is_admin: bool = Depends(check_admin)
 ):
     if not is_admin:
@@ -82,93 +43,223 @@ async def create_product(
         )
 
     # Check if category exists
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.get(Category, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    # Upload image to Firebase Storage
-    image_url = None
-    if image_file:
-        try:
-            compressed_image = compress_image(image_file)
-            bucket = storage.bucket(name='sampe-cab22')
-            blob = bucket.blob(f"product_images/{image_file.filename}")
-            blob.upload_from_file(compressed_image, content_type="image/jpeg")
-            blob.make_public()
-            image_url = blob.public_url
-        except Exception as error:
-            raise HTTPException(status_code=500, detail=f"Error uploading image: {str(error)}")
+    # The image is rendered and uploaded by a background job; the product is
+    # listed right away and picks up its image_url when the job finishes
+    image_data = await image_file.read() if image_file else None
 
     # Create new product
     new_product = Product(
         name=name,
         description=description,
         price=price,
-        image_url=image_url,
-        category_id=category_id
+        category_id=category_id,
+        stock=stock,
+        image_status="pending" if image_data else None
     )
 
     db.add(new_product)
-    db.commit()
-    db.refresh(new_product)
+    await db.flush()
+    if image_data:
+        enqueue_product_image(db, new_product.id, image_data)
+    await db.commit()
+    await db.refresh(new_product)
+    catalog_cache.invalidate()
+    if image_data:
+        jobs.runner.notify()
 
-    return {"message": "Product added successfully", "product": new_product}
+    return {"message": "Product added successfully", "product": new_product, "image_status": new_product.image_status}
 
 
 
-@router.get("/", response_model=dict)
-async def get_products(
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user)  # Extract user ID securely
-):
-    """Fetch all products with cart quantity if present for the authenticated user."""
+# Fields a client may pick with ?fields=; thumbnail_url is derived from image_url
+LIST_FIELDS = ("id", "name", "price", "image_url", "thumbnail_url", "description")
+LIST_INCLUDES = ("category", "cart")
+DETAIL_COLUMNS = {
+    "id": Product.id,
+    "name": Product.name,
+    "price": Product.price,
+    "image_url": Product.image_url,
+    "thumbnail_url": Product.image_url,
+    "description": Product.description,
+    "category_id": Product.category_id,
+    "image_status": Product.image_status,
+}
+DETAIL_INCLUDES = ("category",)
 
-    # Fetch products with LEFT JOIN to include cart quantity
-    products = (
-        db.query(
-            Product,
-            Cart.quantity.label("cart_quantity")
+fields_query = Query(None, description="Comma-separated fields for a trimmed response, e.g. id,name,price,thumbnail_url")
+include_query = Query(None, description="With fields: related data to add to each product")
+
+
+def sparse_list_item(item: dict, names: tuple, includes: tuple, quantities: dict) -> dict:
+    product = {name: thumbnail_url(item["image_url"]) if name == "thumbnail_url" else item[name] for name in names}
+    if "category" in includes:
+        product["category"] = item["category"]
+    if "cart" in includes:
+        product["cart"] = {"quantity": quantities.get(item["id"], 0)}
+    return product
+
+
+def product_list_item(row) -> dict:
+    return {
+        **catalog_item(row),
+        "cart": {
+            "quantity": row.cart_quantity if row.cart_quantity else 0  # If not in cart, quantity = 0
+        }
+    }
+
+
+def product_list_query(user_id: int, *extra_columns):
+    # Category name and cart quantity come back in the same round trip
+    return (
+        select(
+            Product.id,
+            Product.name,
+            Product.price,
+            Product.image_url,
+            Product.description,
+            Product.category_id,
+            Category.name.label("category_name"),
+            Cart.quantity.label("cart_quantity"),
+            *extra_columns
         )
-        .outerjoin(Cart, (Product.id == Cart.product_id) & (Cart.user_id == current_user.id))
-        .all()
+        .join(Category, Product.category_id == Category.id)
+        .outerjoin(Cart, (Product.id == Cart.product_id) & (Cart.user_id == user_id))
     )
 
-    if not products:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No products found"
-        )
 
-    # Construct response
+def cart_quantities_query(user_id: int, product_ids: list):
+    return select(Cart.product_id, Cart.quantity).filter(Cart.user_id == user_id, Cart.product_id.in_(product_ids))
+
+
+@router.get("/", response_model=ProductPage, response_class=ORJSONResponse)
+async def get_products(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    category_id: Optional[int] = Query(None),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    sort: Literal["id", "category", "price_asc", "price_desc"] = Query("id"),
+    fields: Optional[str] = fields_query,
+    include: Optional[str] = include_query,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: dict = Depends(get_current_user_async)  # Extract user ID securely
+):
+    """Fetch a page of products with cart quantity if present for the authenticated user.
+
+    ?fields=id,name,price,thumbnail_url returns just those fields (plus
+    ?include=category,cart when wanted); a list without cart skips the cart query.
+    """
+    fieldset = sparse_fieldset(fields, include, LIST_FIELDS, LIST_INCLUDES)
+    after = None
+    if cursor:
+        after = decode_cursor(cursor, CURSOR_SIZES[sort])
+        if not all(isinstance(value, (int, float)) for value in after):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    # The catalog page comes from the shared snapshot; only this user's cart rows hit the database
+    snapshot = await get_snapshot()
+    items, next_key = snapshot.page(sort, limit, after, category_id, min_price, max_price)
+
+    quantities = {}
+    if items and (fieldset is None or "cart" in fieldset[1]):
+        quantities = dict((await db.execute(
+            cart_quantities_query(current_user.id, [item["id"] for item in items])
+        )).all())
+
+    if fieldset is None:
+        products = [{**item, "cart": {"quantity": quantities.get(item["id"], 0)}} for item in items]
+    else:
+        products = [sparse_list_item(item, *fieldset, quantities) for item in items]
+
+    # Construct response straight from the snapshot items; orjson renders it without jsonable_encoder
     products_response = {
         "status": "success",
         "message": "Products fetched successfully",
-        "products": [
-            {
-                "id": product.id,
-                "name": product.name,
-                "price": product.price,
-                "image_url": product.image_url if product.image_url else None,
-                "description": product.description,
-                "category": {
-                    "id": product.category_id,
-                    "name": product.category.name
-                },
-                "cart": {
-                    "quantity": cart_quantity if cart_quantity else 0  # If not in cart, quantity = 0
-                }
-            }
-            for product, cart_quantity in products
-        ]
+        "products": products,
+        "next_cursor": encode_cursor(next_key) if next_key else None
     }
 
-    return products_response
+    return ORJSONResponse(products_response)
+
+
+@router.get("/catalog")
+async def get_catalog(request: Request):
+    """Every product with its category, the same bytes for every client.
+
+    Served precompressed when the client accepts gzip or brotli, with an ETag
+    for conditional requests. Cart quantities come from GET /cart/.
+    """
+    return (await get_snapshot()).to_response(request)
+
 
 
+@router.get("/search", response_model=ProductPage, response_class=ORJSONResponse)
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    category_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: dict = Depends(get_current_user_async)
+):
+    """Products matching q over name and description, best match first."""
+    matches = await search_matches(db, q)
+    if matches is None:
+        return ORJSONResponse({"status": "success", "message": "No search terms", "products": [], "next_cursor": None})
+
+    score = matches.c.score
+    query = product_list_query(current_user.id, score).join(matches, matches.c.id == Product.id)
+    if category_id is not None:
+        query = query.where(Product.category_id == category_id)
+
+    if cursor:
+        last_score, last_id = decode_cursor(cursor, 2)
+        if not isinstance(last_score, (int, float)) or not isinstance(last_id, int):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        query = query.where(or_(score < last_score, and_(score == last_score, Product.id > last_id)))
+
+    rows = (await db.execute(query.order_by(score.desc(), Product.id).limit(limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].score, rows[-1].id])
+
+    return ORJSONResponse({
+        "status": "success",
+        "message": "Products fetched successfully",
+        "products": [product_list_item(row) for row in rows],
+        "next_cursor": next_cursor
+    })
+
 
-@router.get("/{product_id}", response_model=ProductsResponse)
-def fetch_product(product_id: int, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.id == product_id).first()
+@router.get("/{product_id}", response_model=Union[ProductsResponse, SparseProduct])
+def fetch_product(
+    product_id: int,
+    request: Request,
+    fields: Optional[str] = fields_query,
+    include: Optional[str] = include_query,
+    db: Session = Depends(get_db)  # Primary: a miss fills the catalog cache, which a lagging replica would poison
+):
+    fieldset = sparse_fieldset(fields, include, tuple(DETAIL_COLUMNS), DETAIL_INCLUDES)
+    cache_key = ("product", product_id) if fieldset is None else ("product", product_id, *fieldset)
+    version = catalog_cache.version
+    cached = catalog_cache.lookup(cache_key)
+    if cached:
+        return cached.to_response(request)
+
+    query = db.query(Product).filter(Product.id == product_id)
+    if fieldset:
+        names, includes = fieldset
+        # Only the requested columns leave the database; description is often the bulk of a row
+        query = query.options(load_only(*{DETAIL_COLUMNS[name] for name in names}))
+        if "category" in includes:
+            query = query.options(joinedload(Product.category).load_only(Category.id, Category.name))
+    product = query.first()
 
     if not product:
         raise HTTPException(
@@ -176,4 +267,13 @@ def fetch_product(product_id: int, db: Session = Depends(get_db)):
             detail="Product not found"
         )
 
-    return product
+    if fieldset is None:
+        content = ProductsResponse.model_validate(product)
+    else:
+        content = {
+            name: thumbnail_url(product.image_url) if name == "thumbnail_url" else getattr(product, name)
+            for name in names
+        }
+        if "category" in includes:
+            content["category"] = {"id": product.category.id, "name": product.category.name}
+    return catalog_cache.store(cache_key, version, content).to_response(request)
@@ -0,0 +1,49 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from admin.product_import import BATCH_SIZE, ImportFormat, decode_lines, import_products
+from database import get_async_db
+from response_cache import catalog_cache
+from router.auth import check_admin
+
+router = APIRouter(prefix="/products", tags=["Products"])
+
+CONTENT_TYPE_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/json-lines": "jsonl",
+}
+
+
+@router.post("/import")
+async def import_products_endpoint(
+        request: Request,
+        format: Optional[ImportFormat] = Query(None, description="csv or jsonl; defaults from Content-Type"),
+        batch_size: int = Query(BATCH_SIZE, ge=1, le=10_000),
+        db: AsyncSession = Depends(get_async_db),
+        is_admin: bool = Depends(check_admin)
+):
+    # The body is read as a stream, never buffered whole, so a file of any
+    # size can be sent with e.g. curl --data-binary @products.csv
+    if not is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = format or CONTENT_TYPE_FORMATS.get(content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=csv|jsonl",
+        )
+
+    try:
+        report = await import_products(decode_lines(request.stream()), fmt, db, batch_size)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import file must be UTF-8")
+    finally:
+        catalog_cache.invalidate()
+
+    return {"message": "Import finished", **report.as_dict()}
@@ -1,3 +1,5 @@
+from typing import List, Optional, Union
+
 from pydantic import BaseModel
 from fastapi import File, UploadFile
 
@@ -17,6 +19,58 @@ class ProductsResponse(BaseModel):
     image_url: str | None = None
     price: float
     category_id: int
+    image_status: str | None = None  # "pending" until the image job finishes
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+# Shape of GET /products/; documents the response, which is serialized straight from SQL rows
+class ProductCategory(BaseModel):
+    id: int
+    name: str
+
+
+class ProductCart(BaseModel):
+    quantity: int
+
+
+class ProductListItem(BaseModel):
+    id: int
+    name: str
+    price: float
+    image_url: Optional[str] = None
+    description: Optional[str] = None
+    category: ProductCategory
+    cart: ProductCart
+
+
+# Trimmed shapes for ?fields=...&include=...: id plus whatever was asked for
+class SparseProductListItem(BaseModel):
+    id: int
+    name: Optional[str] = None
+    price: Optional[float] = None
+    image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[ProductCategory] = None
+    cart: Optional[ProductCart] = None
+
+
+class SparseProduct(BaseModel):
+    id: int
+    name: Optional[str] = None
+    price: Optional[float] = None
+    image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    description: Optional[str] = None
+    category_id: Optional[int] = None
+    image_status: Optional[str] = None
+    category: Optional[ProductCategory] = None
+
+
+class ProductPage(BaseModel):
+    status: str
+    message: str
+    products: List[Union[ProductListItem, SparseProductListItem]]
+    next_cursor: Optional[str] = None
@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic import BaseModel
 
 class CategoryCreate(BaseModel):
@@ -12,4 +14,21 @@ class CategoryResponse(BaseModel):
     image_url: str | None = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class CategoryProduct(BaseModel):
+    id: int
+    name: str
+    price: float
+    image_url: str | None = None
+    thumbnail_url: str | None = None
+
+
+class CategoryBrowseItem(CategoryResponse):
+    product_count: int
+    products: List[CategoryProduct]  # The first per_category products, by id
+
+
+class CategoryBrowseResponse(BaseModel):
+    categories: List[CategoryBrowseItem]
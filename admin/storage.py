@@ -0,0 +1,119 @@
+import logging
+import os
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_firebase_app = None
+_firebase_lock = threading.Lock()
+
+
+def firebase_credentials() -> dict:
+    private_key = os.getenv("FIREBASE_PRIVATE_KEY")
+    if not private_key:
+        raise RuntimeError("FIREBASE_PRIVATE_KEY is not set; set STORAGE_BACKEND=local to run without Firebase")
+    return {
+        "type": "service_account",
+        "project_id": os.getenv('FIREBASE_PROJECT_ID'),
+        "private_key_id": os.getenv('FIREBASE_PRIVATE_KEY_ID'),
+        "private_key": private_key.replace("\\n", "\n"),
+        "client_email": os.getenv('FIREBASE_CLIENT_EMAIL'),
+        "client_id": os.getenv('FIREBASE_CLIENT_ID'),
+        "auth_uri": os.getenv('FIREBASE_AUTH_URI'),
+        "token_uri": os.getenv('FIREBASE_TOKEN_URI'),
+        "auth_provider_x509_cert_url": os.getenv('FIREBASE_AUTH_PROVIDER_X509_CERT_URL'),
+        "client_x509_cert_url": os.getenv('FIREBASE_CLIENT_X509_CERT_URL'),
+    }
+
+
+def get_firebase_app():
+    """Initialize Firebase Admin on the first upload instead of at import time."""
+    global _firebase_app
+    # Uploads run in worker threads, so two of them can race to initialize
+    with _firebase_lock:
+        if _firebase_app is None:
+            import firebase_admin
+            from firebase_admin import credentials
+
+            try:
+                _firebase_app = firebase_admin.get_app()
+            except ValueError:
+                _firebase_app = firebase_admin.initialize_app(credentials.Certificate(firebase_credentials()))
+                logger.info("Firebase initialized")
+    return _firebase_app
+
+
+class StorageBackend:
+    """Where product images end up. Names are content-addressed, so objects are immutable."""
+
+    def exists(self, name: str) -> bool:
+        raise NotImplementedError
+
+    def upload(self, name: str, data: bytes, content_type: str) -> str:
+        """Store `data` under `name` and return its public URL."""
+        raise NotImplementedError
+
+    def public_url(self, name: str) -> str:
+        raise NotImplementedError
+
+
+class FirebaseStorage(StorageBackend):
+    def __init__(self, bucket_name: str):
+        self.bucket_name = bucket_name
+
+    def _bucket(self):
+        from firebase_admin import storage
+        return storage.bucket(name=self.bucket_name, app=get_firebase_app())
+
+    def exists(self, name: str) -> bool:
+        return self._bucket().blob(name).exists()
+
+    def upload(self, name: str, data: bytes, content_type: str) -> str:
+        blob = self._bucket().blob(name)
+        blob.cache_control = "public, max-age=31536000, immutable"
+        blob.upload_from_string(data, content_type=content_type)
+        blob.make_public()
+        return blob.public_url
+
+    def public_url(self, name: str) -> str:
+        return f"https://storage.googleapis.com/{self.bucket_name}/{name}"
+
+
+class LocalStorage(StorageBackend):
+    """Filesystem stand-in for Firebase, used locally and in benchmarks."""
+
+    def __init__(self, root: str, base_url: str = "/media"):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def exists(self, name: str) -> bool:
+        return (self.root / name).exists()
+
+    def upload(self, name: str, data: bytes, content_type: str) -> str:
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so a half-written file never looks like a finished upload
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+        return self.public_url(name)
+
+    def public_url(self, name: str) -> str:
+        return f"{self.base_url}/{name}"
+
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firebase")
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", "media")
+
+_storage = None
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "local":
+            _storage = LocalStorage(LOCAL_STORAGE_DIR, os.getenv("LOCAL_STORAGE_URL", "/media"))
+        else:
+            _storage = FirebaseStorage(os.getenv("FIREBASE_STORAGE_BUCKET", "sampe-cab22"))
+    return _storage
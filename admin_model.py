@@ -1,16 +1,25 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset pages for the category and price sorts of GET /products/
+        Index("ix_products_category_id_id", "category_id", "id"),
+        Index("ix_products_price_id", "price", "id"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
     price = Column(Float, nullable=False)
     image_url = Column(String, nullable=True)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    # Units available for checkout; NULL means stock is not tracked for this product
+    stock = Column(Integer, nullable=True)
+    # "pending" while a background job renders the uploaded image, then "ready" or "failed"
+    image_status = Column(String, nullable=True)
 
     # Create a relationship to the Category model
     category = relationship("Category", back_populates="products")
@@ -20,7 +29,7 @@ class Product(Base):
 class Category(Base):
     __tablename__ = 'categories'  # Plural form for consistency
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
     image_url = Column(String, nullable=True)
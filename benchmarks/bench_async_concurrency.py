@@ -0,0 +1,133 @@
+"""Concurrency check for the async database path, through the real routes.
+
+Every SQLite statement on the async engine is delayed by ``--delay`` seconds
+inside the driver thread. ``--requests`` concurrent GET /cart/ and GET
+/products/ calls then each wait on one delayed statement. If the routes keep
+the event loop free while the database works, the calls overlap and a batch
+takes about one delay. If anything blocks the loop, they run one after another
+and a batch takes ``requests * delay``. The check fails (exit status 1) when a
+batch takes more than ``--max-ratio`` of that serial time.
+
+Keep ``--requests`` within the SQLite pool (15 connections) so the calls are
+not queued on the pool instead.
+
+    python benchmarks/bench_async_concurrency.py --requests 10 --delay 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_db_file = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.util import await_only  # noqa: E402
+
+import database  # noqa: E402
+from admin.router.add_product import router as product_router  # noqa: E402
+from admin_model import Category, Product  # noqa: E402
+from models import Cart, User  # noqa: E402
+from router.cart_api import router as cart_router  # noqa: E402
+from router.login_api import create_access_token  # noqa: E402
+
+PATHS = ("/cart/", "/products/")
+
+
+def install_delay(delay: float):
+    # aiosqlite runs statements on one thread per connection, so the delay is
+    # injected from SQLite's progress handler on that thread, never on the loop
+    @event.listens_for(database.async_engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        pending = connection_record.info.setdefault("pending_delay", [False])
+
+        def handler():
+            if pending[0]:
+                pending[0] = False
+                time.sleep(delay)
+            return 0
+
+        await_only(dbapi_connection.driver_connection.set_progress_handler(handler, 1))
+
+    @event.listens_for(database.async_engine.sync_engine, "before_cursor_execute")
+    def _slow_async(conn, cursor, statement, parameters, context, executemany):
+        conn.connection.info["pending_delay"][0] = True
+
+
+async def fire(client: httpx.AsyncClient, path: str, count: int) -> dict:
+    async def one():
+        start = time.perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    wall_start = time.perf_counter()
+    latencies = await asyncio.gather(*(one() for _ in range(count)))
+    wall = time.perf_counter() - wall_start
+    return {
+        "path": path,
+        "requests": count,
+        "wall_s": round(wall, 4),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+    }
+
+
+async def main(count: int, delay: float, max_ratio: float) -> int:
+    database.engine.echo = False
+    database.Base.metadata.create_all(bind=database.engine)
+    with database.SessionLocal() as db:
+        db.add(User(id=1, name="bench", email="bench@example.com", phone="0", password="x"))
+        db.add(Category(id=1, name="bench"))
+        db.add_all(Product(id=i, name=f"bench {i}", price=i, category_id=1) for i in range(1, 51))
+        db.add(Cart(user_id=1, product_id=1, quantity=2, price=1.0))
+        db.commit()
+
+    install_delay(delay)
+    app = FastAPI()
+    app.include_router(cart_router)
+    app.include_router(product_router)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': '1'})}"}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            # Warm the auth cache and the catalog snapshot, and check the delay is really applied
+            warm = [await fire(client, path, 1) for path in PATHS]
+            results = [await fire(client, path, count) for path in PATHS]
+    finally:
+        await database.dispose_engines()
+
+    serial_s = count * delay
+    failures = []
+    for result in warm:
+        if result["wall_s"] < delay:
+            failures.append(f"{result['path']}: a single call took {result['wall_s']}s, under the {delay}s delay")
+    for result in results:
+        result["serial_s"] = round(serial_s, 4)
+        result["ratio"] = round(result["wall_s"] / serial_s, 3)
+        if result["ratio"] > max_ratio:
+            failures.append(f"{result['path']}: {result['wall_s']}s for {count} calls, "
+                            f"over {max_ratio:.0%} of the {serial_s}s serial time")
+
+    print(json.dumps({"delay_s": delay, "max_ratio": max_ratio, "results": results, "failures": failures},
+                     indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.05)
+    parser.add_argument("--max-ratio", type=float, default=0.5,
+                        help="fail when a batch takes more than this share of requests * delay")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.requests, args.delay, args.max_ratio)))
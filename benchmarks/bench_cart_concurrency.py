@@ -0,0 +1,84 @@
+"""Parallel cart increments for one user: no lost updates, fixed statement count.
+
+Fires ``--requests`` concurrent POST /cart/add calls for the same product and
+checks that the final quantity equals the sum of the increments, then reports
+how many SQL statements each call issued.
+
+    python benchmarks/bench_cart_concurrency.py --requests 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_db_file = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import database  # noqa: E402
+from admin_model import Category, Product  # noqa: E402
+from models import Cart, User  # noqa: E402
+from router.cart_api import router as cart_router  # noqa: E402
+from router.login_api import create_access_token  # noqa: E402
+
+
+async def main(count: int):
+    database.engine.echo = False
+    database.Base.metadata.create_all(bind=database.engine)
+    with database.SessionLocal() as db:
+        db.add(User(id=1, name="bench", email="bench@example.com", phone="0", password="x"))
+        db.add(Category(id=1, name="bench"))
+        db.add(Product(id=1, name="bench", price=2.5, category_id=1))
+        db.commit()
+
+    statements = []
+    event.listen(database.async_engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement.split()[0]))
+
+    app = FastAPI()
+    app.include_router(cart_router)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': '1'})}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        # Warm the auth cache so only cart statements are counted
+        await client.get("/cart/")  # 404 for the empty cart, after the user is cached
+        statements.clear()
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post("/cart/add", json={"product_id": 1, "quantity": 1}) for _ in range(count)
+        ))
+        elapsed = time.perf_counter() - start
+
+    for response in responses:
+        response.raise_for_status()
+    await database.async_engine.dispose()
+
+    with database.SessionLocal() as db:
+        final = db.query(Cart.quantity).filter(Cart.user_id == 1, Cart.product_id == 1).scalar()
+
+    print(json.dumps({
+        "requests": count,
+        "final_quantity": final,
+        "lost_updates": count - final,
+        "statements_per_call": round(len(statements) / count, 2),
+        "statement_kinds": sorted(set(statements)),
+        "seconds": round(elapsed, 3),
+    }, indent=2))
+    if final != count:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    asyncio.run(main(parser.parse_args().requests))
@@ -0,0 +1,115 @@
+"""Many users checking out the same SKU at once: throughput, latency, correctness.
+
+Each of ``--users`` users has the one contended product in their cart, with
+``--stock`` units available. Every user fires ``--retries`` concurrent
+POST /orders/checkout calls with the same Idempotency-Key, as a client that
+retries on timeout would. Reports orders/sec and p50/p99 latency, and fails if
+stock was oversold or any user was charged twice.
+
+    python benchmarks/bench_checkout_contention.py --users 200 --stock 150
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_db_file = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_file}")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+import database  # noqa: E402
+from admin_model import Category, Product  # noqa: E402
+from models import Cart, Order, User  # noqa: E402
+from router.login_api import create_access_token  # noqa: E402
+from router.order_api import router as order_router  # noqa: E402
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def main(users: int, stock: int, retries: int):
+    database.Base.metadata.create_all(bind=database.engine)
+    with database.SessionLocal() as db:
+        db.add(Category(id=1, name="bench"))
+        db.add(Product(id=1, name="contended", price=9.99, category_id=1, stock=stock))
+        for user_id in range(1, users + 1):
+            db.add(User(id=user_id, name=f"bench{user_id}", email=f"bench{user_id}@example.com",
+                        phone=str(user_id), password="x"))
+            db.add(Cart(user_id=user_id, product_id=1, quantity=1, price=9.99))
+        db.commit()
+
+    app = FastAPI()
+    app.include_router(order_router)
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+
+    async def attempt(client, headers):
+        start = time.perf_counter()
+        response = await client.post("/orders/checkout", headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        return response
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        requests = []
+        for user_id in range(1, users + 1):
+            headers = {
+                "Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}",
+                "Idempotency-Key": str(uuid.uuid4()),
+            }
+            requests += [attempt(client, headers) for _ in range(retries)]
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(*requests)
+        elapsed = time.perf_counter() - start
+    await database.async_engine.dispose()
+
+    outcomes = Counter(
+        "replayed" if response.headers.get("Idempotent-Replayed") else str(response.status_code)
+        for response in responses
+    )
+    with database.SessionLocal() as db:
+        remaining = db.query(Product.stock).filter(Product.id == 1).scalar()
+        orders_per_user = Counter(user_id for (user_id,) in db.query(Order.user_id))
+    orders = sum(orders_per_user.values())
+
+    report = {
+        "users": users,
+        "stock": stock,
+        "requests": len(responses),
+        "outcomes": dict(outcomes),
+        "orders": orders,
+        "stock_remaining": remaining,
+        "oversold": orders > stock or remaining < 0,
+        "double_orders": sum(1 for count in orders_per_user.values() if count > 1),
+        "orders_per_sec": round(orders / elapsed, 1),
+        "latency_ms": {
+            "p50": round(statistics.median(latencies), 1),
+            "p99": round(percentile(latencies, 0.99), 1),
+        },
+        "seconds": round(elapsed, 3),
+    }
+    print(json.dumps(report, indent=2))
+    if report["oversold"] or report["double_orders"] or orders != min(users, stock) or remaining != stock - orders:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--stock", type=int, default=150)
+    parser.add_argument("--retries", type=int, default=2, help="concurrent attempts per idempotency key")
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.stock, args.retries))
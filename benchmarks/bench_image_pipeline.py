@@ -0,0 +1,73 @@
+"""Uploads/sec and peak RSS for the product image pipeline.
+
+Generates camera-sized JPEGs, pushes them through store_product_image into a
+LocalStorage directory, and reports throughput and peak memory for the API
+process and the image worker processes.
+
+    python benchmarks/bench_image_pipeline.py --uploads 20 --concurrency 4 --size 4000x3000
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image  # noqa: E402
+
+from admin import image_pipeline  # noqa: E402
+from admin.image_pipeline import IMAGE_WORKERS, store_product_image  # noqa: E402
+from admin.storage import LocalStorage  # noqa: E402
+
+
+def make_jpeg(width: int, height: int, seed: int) -> bytes:
+    # Noise compresses badly, which keeps the source close to a real photo's size
+    image = Image.effect_noise((width, height), 64 + seed % 32).convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+async def main(uploads: int, concurrency: int, width: int, height: int, duplicates: bool):
+    sources = [make_jpeg(width, height, 0 if duplicates else i) for i in range(uploads)]
+    storage = LocalStorage(tempfile.mkdtemp())
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(data: bytes):
+        async with semaphore:
+            await store_product_image(data, storage)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(data) for data in sources))
+    elapsed = time.perf_counter() - start
+    # Workers only show up in RUSAGE_CHILDREN once they have exited
+    if image_pipeline._executor is not None:
+        image_pipeline._executor.shutdown(wait=True)
+
+    print(json.dumps({
+        "uploads": uploads,
+        "source_size": f"{width}x{height}",
+        "source_mb": round(sum(map(len, sources)) / uploads / 1e6, 2),
+        "image_workers": IMAGE_WORKERS,
+        "seconds": round(elapsed, 3),
+        "uploads_per_sec": round(uploads / elapsed, 2),
+        # ru_maxrss is reported in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_worker_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--size", default="4000x3000")
+    parser.add_argument("--duplicates", action="store_true", help="upload the same image every time")
+    args = parser.parse_args()
+    w, h = (int(part) for part in args.size.split("x"))
+    asyncio.run(main(args.uploads, args.concurrency, w, h, args.duplicates))
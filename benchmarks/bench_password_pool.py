@@ -0,0 +1,85 @@
+"""Logins/sec through POST /users/login for different bcrypt pool sizes.
+
+Runs the real login route in-process against a throwaway SQLite database and
+fires ``--concurrency`` logins at a time for each worker count.
+
+    python benchmarks/bench_password_pool.py --workers 1 2 4 8 --logins 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_db_file = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+# This measures bcrypt throughput: every login is the same identifier from the
+# same address, so lift the login rate limits and the password-check cap
+os.environ.setdefault("LOGIN_RATE_PER_IP", "1000000/1")
+os.environ.setdefault("LOGIN_RATE_PER_IDENTIFIER", "1000000/1")
+os.environ.setdefault("MAX_PASSWORD_CHECKS", "1000000")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+import database  # noqa: E402
+import passwords  # noqa: E402
+from admin_model import Category, Product  # noqa: E402,F401
+from models import User  # noqa: E402
+from router.login_api import router as login_router  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+
+
+async def run(workers: int, logins: int, concurrency: int, client: httpx.AsyncClient) -> dict:
+    passwords.configure_pool(workers)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            response = await client.post(
+                "/users/login", json={"identifier": "bench@example.com", "password": PASSWORD}
+            )
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    return {"workers": workers, "logins": logins, "seconds": round(elapsed, 3),
+            "logins_per_sec": round(logins / elapsed, 2)}
+
+
+async def main(worker_counts: list[int], logins: int, concurrency: int):
+    database.engine.echo = False
+    database.Base.metadata.create_all(bind=database.engine)
+    with database.SessionLocal() as db:
+        db.add(User(name="bench", email="bench@example.com", phone="0",
+                    password=passwords.get_pwd_context().hash(PASSWORD)))
+        db.commit()
+
+    app = FastAPI()
+    app.include_router(login_router)
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            results = [await run(workers, logins, concurrency, client) for workers in worker_counts]
+    finally:
+        # Left open, the aiosqlite and bcrypt worker threads keep the process from exiting
+        await database.dispose_engines()
+        passwords.shutdown()
+    print(json.dumps({"bcrypt_rounds": passwords.BCRYPT_ROUNDS, "cpus": os.cpu_count(),
+                      "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(main(args.workers, args.logins, args.concurrency))
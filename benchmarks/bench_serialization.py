@@ -0,0 +1,83 @@
+"""Serialization throughput for the product list payload.
+
+Compares the generic path that response_model=dict goes through
+(jsonable_encoder, then json.dumps) with the orjson response class used by
+the hot list endpoints. A typed pydantic dump is included for reference.
+
+    python benchmarks/bench_serialization.py --products 100 5000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from admin.schemas.add_product_schema import ProductPage  # noqa: E402
+
+page_adapter = TypeAdapter(ProductPage)
+
+
+def make_payload(count: int) -> dict:
+    return {
+        "status": "success",
+        "message": "Products fetched successfully",
+        "products": [
+            {
+                "id": i,
+                "name": f"Paneer Butter Masala {i}",
+                "price": 249.0 + i % 100,
+                "image_url": f"https://storage.googleapis.com/sampe-cab22/product_images/{i:064x}/detail.jpg",
+                "description": "Cottage cheese simmered in a rich tomato and butter gravy " * 3,
+                "category": {"id": i % 40, "name": f"Category {i % 40}"},
+                "cart": {"quantity": i % 3},
+            }
+            for i in range(count)
+        ],
+        "next_cursor": "WzEwMF0",
+    }
+
+
+SERIALIZERS = {
+    "jsonable_encoder+json": lambda payload: JSONResponse(jsonable_encoder(payload)).body,
+    "orjson_response": lambda payload: ORJSONResponse(payload).body,
+    "pydantic_typed": lambda payload: page_adapter.dump_json(page_adapter.validate_python(payload)),
+}
+
+
+def bench(serialize, payload: dict, min_seconds: float) -> dict:
+    iterations, total_bytes = 0, 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < min_seconds:
+        total_bytes += len(serialize(payload))
+        iterations += 1
+    return {
+        "ms_per_response": round(elapsed / iterations * 1000, 3),
+        "mb_per_sec": round(total_bytes / elapsed / 1e6, 1),
+    }
+
+
+def main(sizes: list[int], min_seconds: float):
+    results = []
+    for size in sizes:
+        payload = make_payload(size)
+        row = {"products": size}
+        for name, serialize in SERIALIZERS.items():
+            row[name] = bench(serialize, payload, min_seconds)
+        base = row["jsonable_encoder+json"]["ms_per_response"]
+        row["orjson_speedup"] = round(base / row["orjson_response"]["ms_per_response"], 1)
+        results.append(row)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, nargs="+", default=[100, 5000])
+    parser.add_argument("--seconds", type=float, default=1.0, help="minimum time per measurement")
+    args = parser.parse_args()
+    main(args.products, args.seconds)
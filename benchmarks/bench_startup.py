@@ -0,0 +1,109 @@
+"""Import time and time to first response for a cold worker.
+
+Each run is a fresh interpreter that imports main, enters the app lifespan and
+serves GET / in-process, which is what an autoscaled dyno does before it can
+take traffic. Medians over several runs are reported, along with the optional
+heavy modules that got imported. --baseline measures another git revision the
+same way (in a temporary worktree) and reports the difference.
+
+    python benchmarks/bench_startup.py --runs 10
+    python benchmarks/bench_startup.py --baseline HEAD~1
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that only some requests need; a cold start should not load them
+HEAVY_MODULES = ["firebase_admin", "google.cloud.storage", "PIL", "passlib", "psycopg2", "asyncpg"]
+
+CHILD = """
+import asyncio, json, sys, time
+import httpx
+
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+
+async def first_request():
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get("/")
+            response.raise_for_status()
+        return time.perf_counter()
+
+responded = asyncio.run(first_request())
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_response_ms": (responded - start) * 1000,
+    "heavy_modules": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def measure(cwd: str, runs: int) -> dict:
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{tempfile.gettempdir()}/bench_startup.db",
+        # Older revisions crash at import without it; the value is never used
+        FIREBASE_PRIVATE_KEY=os.environ.get("FIREBASE_PRIVATE_KEY", "unused"),
+        SECRET_KEY=os.environ.get("SECRET_KEY", "bench"),
+        ACCESS_LOG="0",
+    )
+    env.pop("ASYNC_DATABASE_URL", None)
+    # One unmeasured run so every revision starts with warm .pyc and disk caches
+    samples = []
+    for i in range(runs + 1):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD % (HEAVY_MODULES,)],
+            cwd=cwd, env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        process_ms = (time.perf_counter() - start) * 1000
+        if i:
+            samples.append({**json.loads(output.strip().splitlines()[-1]), "process_ms": process_ms})
+
+    return {
+        "import_ms": round(statistics.median(s["import_ms"] for s in samples), 1),
+        "first_response_ms": round(statistics.median(s["first_response_ms"] for s in samples), 1),
+        "process_ms": round(statistics.median(s["process_ms"] for s in samples), 1),
+        "heavy_modules": samples[-1]["heavy_modules"],
+    }
+
+
+def measure_revision(revision: str, runs: int) -> dict:
+    worktree = tempfile.mkdtemp(prefix="bench_startup_")
+    subprocess.run(["git", "worktree", "add", "--detach", worktree, revision],
+                   cwd=ROOT, check=True, capture_output=True)
+    try:
+        return measure(worktree, runs)
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=ROOT, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--baseline", help="git revision to compare against, e.g. HEAD~1")
+    args = parser.parse_args()
+
+    report = {"current": measure(ROOT, args.runs)}
+    if args.baseline:
+        report["baseline"] = {"revision": args.baseline, **measure_revision(args.baseline, args.runs)}
+        report["saved_ms"] = {
+            key: round(report["baseline"][key] - report["current"][key], 1)
+            for key in ("import_ms", "first_response_ms", "process_ms")
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
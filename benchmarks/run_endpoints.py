@@ -0,0 +1,160 @@
+"""Throughput and latency percentiles for the main API endpoints.
+
+Runs a fixed scenario against a database seeded by scripts/seed.py, either
+in-process (the default, no server needed) or over HTTP against a running
+uvicorn. It prints JSON that can be saved and diffed between commits.
+
+    python scripts/seed.py --database-url sqlite:///bench.db --products 5000 --users 2000 --carts 10000
+    python benchmarks/run_endpoints.py --database-url sqlite:///bench.db --output before.json
+    python benchmarks/run_endpoints.py --base-url http://127.0.0.1:8000 --requests 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from scripts.seed import SEED_PASSWORD, WORDS  # noqa: E402
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def measure(name: str, make_request, count: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await make_request(i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "endpoint": name,
+        "requests": count,
+        "errors": errors,
+        "throughput_rps": round(count / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def run(client: httpx.AsyncClient, args) -> list:
+    rng = random.Random(args.seed)
+    user_ids = [rng.randint(1, args.users) for _ in range(args.logins)]
+
+    def login(i: int):
+        identifier = f"user{user_ids[i % len(user_ids)]}@example.com"
+        return client.post("/users/login", json={"identifier": identifier, "password": SEED_PASSWORD})
+
+    # Logins are bcrypt-bound, so they get their own (smaller) request count
+    results = [await measure("POST /users/login", login, args.logins, args.concurrency)]
+
+    tokens = []
+    for user_id in user_ids[: args.sessions]:
+        response = await client.post(
+            "/users/login", json={"identifier": f"user{user_id}@example.com", "password": SEED_PASSWORD}
+        )
+        response.raise_for_status()
+        tokens.append({"Authorization": f"Bearer {response.json()['access_token']}"})
+
+    def auth(i: int) -> dict:
+        return tokens[i % len(tokens)]
+
+    scenario = {
+        "GET /products/": lambda i: client.get("/products/", headers=auth(i)),
+        "GET /products/?fields=": lambda i: client.get(
+            "/products/", params={"fields": "id,name,price,thumbnail_url"}, headers=auth(i)
+        ),
+        "GET /products/catalog": lambda i: client.get("/products/catalog", headers={"Accept-Encoding": "br, gzip"}),
+        "GET /products/search": lambda i: client.get(
+            "/products/search", params={"q": rng.choice(WORDS)[:4]}, headers=auth(i)
+        ),
+        "POST /cart/add": lambda i: client.post(
+            "/cart/add", json={"product_id": rng.randint(1, args.products), "quantity": 1}, headers=auth(i)
+        ),
+        "GET /cart/": lambda i: client.get("/cart/", headers=auth(i)),
+        "GET /categories/": lambda i: client.get("/categories/"),
+        "GET /categories/browse": lambda i: client.get("/categories/browse"),
+    }
+    for name, make_request in scenario.items():
+        results.append(await measure(name, make_request, args.requests, args.concurrency))
+    return results
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args):
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+            results = await run(client, args)
+    else:
+        from main import app
+        # ASGITransport skips the lifespan; without its shutdown the engines,
+        # job runner and worker pools keep the process alive after the run
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+                results = await run(client, args)
+
+    report = {
+        "revision": git_revision(),
+        "mode": "http" if args.base_url else "in-process",
+        "database": os.environ.get("DATABASE_URL", "").split("@")[-1],
+        "python": platform.python_version(),
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="seeded database for in-process mode (required there)")
+    parser.add_argument("--base-url", help="benchmark a running server instead of running in-process")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=10, help="distinct logged-in users")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--users", type=int, default=2000, help="users present in the seeded database")
+    parser.add_argument("--products", type=int, default=5000, help="products present in the seeded database")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    if not args.base_url:
+        # Never fall back to DATABASE_URL: benchmark load belongs on a seeded scratch database
+        if not args.database_url:
+            parser.error("--database-url is required unless --base-url is given")
+        os.environ["DATABASE_URL"] = args.database_url
+    # Keep per-request logging out of the measurement
+    os.environ.setdefault("ACCESS_LOG", "0")
+    asyncio.run(main(args))
@@ -0,0 +1,235 @@
+"""Immutable in-memory copy of the product catalog, shared by every user.
+
+The catalog part of a product listing (product, category) is the same for
+everyone; only the cart quantity differs. The snapshot holds every product
+once, presorted for each listing order, so a page is a bisect and a short
+scan. The caller then fetches the user's cart quantities for that page by
+(user_id, product_id) and merges them in.
+
+It is rebuilt on the next request after catalog_cache is invalidated (the
+admin write paths already do that). Since that invalidation is per process,
+a snapshot older than CATALOG_SNAPSHOT_TTL seconds is also refreshed, in the
+background while it keeps being served, so writes made through another worker
+show up.
+
+The whole catalog is also kept serialized and precompressed (gzip, and
+brotli when the `brotli` package is installed) for GET /products/catalog.
+"""
+import asyncio
+import gzip
+import logging
+import os
+import time
+from bisect import bisect_right
+from itertools import islice
+
+import orjson
+from fastapi import Request, Response
+from sqlalchemy import select
+
+from admin_model import Category, Product
+from database import get_async_session_factory
+from response_cache import CachedResponse, catalog_cache
+
+logger = logging.getLogger(__name__)
+
+CATALOG_SNAPSHOT_TTL = float(os.getenv("CATALOG_SNAPSHOT_TTL", "30"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 9  # Compressed once per rebuild, so a slow, dense setting is affordable
+
+# Listing orders: the sort key of an item, and whether the order is descending
+SORT_KEYS = {
+    "id": (lambda item: (item["id"],), False),
+    "category": (lambda item: (item["category"]["id"], item["id"]), False),
+    "price_asc": (lambda item: (item["price"], item["id"]), False),
+    "price_desc": (lambda item: (item["price"], item["id"]), True),
+}
+CURSOR_SIZES = {"id": 1, "category": 2, "price_asc": 2, "price_desc": 2}
+
+
+def catalog_item(row) -> dict:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "price": row.price,
+        "image_url": row.image_url if row.image_url else None,
+        "description": row.description,
+        "category": {
+            "id": row.category_id,
+            "name": row.category_name
+        }
+    }
+
+
+def catalog_query():
+    return (
+        select(
+            Product.id,
+            Product.name,
+            Product.price,
+            Product.image_url,
+            Product.description,
+            Product.category_id,
+            Category.name.label("category_name")
+        )
+        .join(Category, Product.category_id == Category.id)
+        .order_by(Product.id)
+    )
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def accepted_encodings(header: str | None) -> set:
+    """Codings named in Accept-Encoding, minus those refused with q=0."""
+    accepted = set()
+    for part in (header or "").split(","):
+        name, *params = part.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def search_key(key: tuple, descending: bool) -> tuple:
+    return tuple(-value for value in key) if descending else key
+
+
+class CatalogSnapshot:
+    def __init__(self, version: int, rows):
+        self.version = version
+        self.built_at = time.monotonic()
+        items = [catalog_item(row) for row in rows]
+
+        # (sort, category_id or None) -> (ascending search keys, items in listing order)
+        self._orders = {}
+        for sort, (key, descending) in SORT_KEYS.items():
+            ordered = sorted(items, key=key, reverse=descending)
+            # Descending orders get negated keys, so bisect can treat every order as ascending
+            keys = [search_key(key(item), descending) for item in ordered]
+            self._orders[(sort, None)] = (keys, ordered)
+            by_category = {}
+            for search, item in zip(keys, ordered):
+                category_keys, category_items = by_category.setdefault(item["category"]["id"], ([], []))
+                category_keys.append(search)
+                category_items.append(item)
+            for category_id, index in by_category.items():
+                self._orders[(sort, category_id)] = index
+
+        body = orjson.dumps({"status": "success", "message": "Catalog fetched successfully", "products": items})
+        self.cached = CachedResponse(body)  # ETag and If-None-Match handling
+        self.bodies = {"identity": body, "gzip": gzip.compress(body, GZIP_LEVEL, mtime=0)}
+        brotli = _brotli()
+        if brotli is not None:
+            self.bodies["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+        self.size = len(items)
+
+    def expired(self) -> bool:
+        return time.monotonic() - self.built_at >= CATALOG_SNAPSHOT_TTL
+
+    def page(self, sort: str, limit: int, after: list | None = None, category_id: int | None = None,
+             min_price: float | None = None, max_price: float | None = None) -> tuple[list, list | None]:
+        """Up to `limit` items after the `after` sort key, and the key to continue from (or None)."""
+        keys, ordered = self._orders.get((sort, category_id), ([], []))
+        key, descending = SORT_KEYS[sort]
+        start = 0
+        if after is not None:
+            start = bisect_right(keys, search_key(tuple(after), descending))
+
+        items = []
+        for item in islice(ordered, start, None):
+            price = item["price"]
+            if max_price is not None and price > max_price:
+                if sort == "price_asc":
+                    break  # Every later item costs more
+                continue
+            if min_price is not None and price < min_price:
+                if sort == "price_desc":
+                    break
+                continue
+            items.append(item)
+            # One extra item tells whether another page exists
+            if len(items) > limit:
+                break
+
+        if len(items) > limit:
+            items = items[:limit]
+            return items, list(key(items[-1]))
+        return items, None
+
+    def to_response(self, request: Request) -> Response:
+        headers = {"ETag": self.cached.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if self.cached.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+
+        accepted = accepted_encodings(request.headers.get("accept-encoding"))
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and (encoding in accepted or "*" in accepted):
+                headers["Content-Encoding"] = encoding
+                return Response(content=self.bodies[encoding], media_type="application/json", headers=headers)
+        return Response(content=self.bodies["identity"], media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "products": self.size,
+            "age_s": round(time.monotonic() - self.built_at, 1),
+            "bytes": {encoding: len(body) for encoding, body in self.bodies.items()},
+        }
+
+
+_snapshot: CatalogSnapshot | None = None
+_rebuild_lock = asyncio.Lock()
+_refresh_task: asyncio.Task | None = None
+
+
+async def _rebuild() -> CatalogSnapshot:
+    global _snapshot
+    # One rebuild at a time; requests that queued behind it reuse its result
+    async with _rebuild_lock:
+        snapshot = _snapshot
+        if snapshot is not None and snapshot.version == catalog_cache.version and not snapshot.expired():
+            return snapshot
+        # Read the version first: a write during the rebuild leaves the new snapshot already stale
+        version = catalog_cache.version
+        # From the primary: a lagging replica would bake the pre-write catalog into the new version
+        async with get_async_session_factory()() as db:
+            rows = (await db.execute(catalog_query())).all()
+        # Sorting, serializing and compressing a large catalog would stall the event loop
+        _snapshot = await asyncio.to_thread(CatalogSnapshot, version, rows)
+        return _snapshot
+
+
+async def _refresh() -> None:
+    try:
+        await _rebuild()
+    except Exception:
+        logger.exception("Refreshing the catalog snapshot failed")
+
+
+async def get_snapshot() -> CatalogSnapshot:
+    """The current snapshot, rebuilt first if a catalog write in this process made it stale."""
+    global _refresh_task
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != catalog_cache.version:
+        return await _rebuild()
+    if snapshot.expired() and (_refresh_task is None or _refresh_task.done()):
+        # Merely old: keep serving it while a background task picks up other workers' writes
+        _refresh_task = asyncio.create_task(_refresh())
+    return snapshot
+
+
+def snapshot_stats() -> dict | None:
+    return _snapshot.stats() if _snapshot is not None else None
@@ -0,0 +1,156 @@
+"""Connection pool sizing, instrumentation and exhaustion handling.
+
+Pools are sized from a connection budget per database server, shared by every
+worker on every dyno. Each worker splits its share between the sync and async
+engines, so adding workers never pushes Postgres past max_connections.
+
+Checkouts go through a QueuePool subclass that records wait time and timeouts.
+A checkout that times out surfaces as a 503 with Retry-After, not a 500.
+"""
+import logging
+import math
+import os
+import threading
+import time
+
+from fastapi import HTTPException
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette import status
+
+from query_metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Connections this app may hold on one database server, summed over all workers
+DB_CONNECTION_BUDGET = int(os.getenv("DB_CONNECTION_BUDGET", "60"))
+# Worker processes sharing the budget (the variable uvicorn and gunicorn read)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Part of a worker's share given to the sync engine; most routes are async
+DB_SYNC_POOL_SHARE = float(os.getenv("DB_SYNC_POOL_SHARE", "0.25"))
+# Fail fast: a request should not sit 30 s waiting for a connection
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_POOL_RETRY_AFTER = int(os.getenv("DB_POOL_RETRY_AFTER", "2"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+
+# Checkout waits are normally well under a millisecond
+POOL_WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+PoolTimeoutError = exc.TimeoutError
+
+
+def pool_limits(is_async: bool) -> tuple[int, int]:
+    """(pool_size, max_overflow) for one engine of this worker."""
+    per_worker = max(2, DB_CONNECTION_BUDGET // max(1, WEB_CONCURRENCY))
+    sync_share = max(1, round(per_worker * DB_SYNC_POOL_SHARE))
+    connections = max(1, per_worker - sync_share) if is_async else sync_share
+    # Two thirds stay open; the rest are overflow, opened only under load
+    pool_size = max(1, math.ceil(connections * 2 / 3))
+    return pool_size, connections - pool_size
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.timeouts = 0
+        self.wait = Histogram(POOL_WAIT_BUCKETS_MS)
+        self._lock = threading.Lock()  # sync checkouts happen on threadpool threads
+
+    def observe(self, wait_ms: float, timed_out: bool) -> None:
+        with self._lock:
+            self.wait.observe(wait_ms)
+            self.timeouts += timed_out
+
+
+class _TimedPoolMixin:
+    metrics: PoolMetrics | None = None
+
+    def _do_get(self):
+        if self.metrics is None:
+            return super()._do_get()
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.metrics.observe((time.perf_counter() - start) * 1000, timed_out)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+# Log under the stock pool names: outside the sqlalchemy.* namespace (and its
+# default WARNING level), "Pool disposed" / "recreating" would reach the root logger at INFO
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.QueuePool"
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
+
+def pool_options(url: str, is_async: bool) -> dict:
+    poolclass = TimedAsyncQueuePool if is_async else TimedQueuePool
+    if url.startswith("sqlite"):
+        options = {"connect_args": {"check_same_thread": False}}
+        # In-memory databases need their single shared connection (StaticPool)
+        if ":memory:" not in url:
+            options.update(poolclass=poolclass, pool_timeout=DB_POOL_TIMEOUT)
+        return options
+
+    pool_size, max_overflow = pool_limits(is_async)
+    if is_async:
+        connect_args = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+    else:
+        connect_args = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return {
+        "poolclass": poolclass,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": 3600,   # Recycle connections after this many seconds
+        "pool_pre_ping": True,  # Replace connections the server or a proxy dropped while idle
+        "connect_args": connect_args,
+    }
+
+
+_pools: dict[str, object] = {}
+
+
+def track_pool(name: str, engine) -> None:
+    """Record waits and timeouts for `engine`'s pool and list it in pool_status()."""
+    if isinstance(engine.pool, _TimedPoolMixin):
+        engine.pool.metrics = PoolMetrics()
+        _pools[name] = engine
+
+
+def pool_status() -> list:
+    status_rows = []
+    for name, engine in _pools.items():
+        pool = engine.pool
+        metrics = pool.metrics
+        status_rows.append({
+            "pool": name,
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+            "timeout_s": pool._timeout,
+            "timeouts": metrics.timeouts,
+            "wait_ms": metrics.wait.snapshot(),
+        })
+    return status_rows
+
+
+def pool_exhausted() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Database busy. Try again shortly.",
+        headers={"Retry-After": str(DB_POOL_RETRY_AFTER)},
+    )
@@ -0,0 +1,26 @@
+from fastapi import HTTPException
+from starlette import status
+
+
+# Sparse fieldsets: ?fields=id,name,price&include=category asks for a trimmed
+# response; without ?fields the endpoint keeps its full default shape
+def parse_names(value: str, allowed: tuple, param: str) -> tuple:
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = sorted(names - set(allowed))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown {param}: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+    # Canonical order, so equivalent requests share a cache entry
+    return tuple(name for name in allowed if name in names)
+
+
+def sparse_fieldset(fields: str | None, include: str | None, allowed_fields: tuple, allowed_includes: tuple):
+    """(fields, includes) for a trimmed response, or None for the full shape. id is always returned."""
+    if fields is None:
+        return None
+    names = parse_names(fields, allowed_fields, "fields")
+    if "id" not in names:
+        names = ("id",) + names
+    return names, parse_names(include or "", allowed_includes, "include")
@@ -1,9 +1,13 @@
-from database import Base, engine
+from database import Base, get_engine
 from models import User
 from admin_model import Product,Category
+from migrations.runner import run_migrations
 # Create tables
 print("Creating database tables...")
-Base.metadata.create_all(bind=engine)
+Base.metadata.create_all(bind=get_engine())
 print("Database tables created.")
 
+# Bring indexes and later schema changes up to date
+run_migrations(get_engine())
+print("Database migrations applied.")
 
@@ -0,0 +1,224 @@
+"""Persisted background jobs for slow side effects (image processing, search
+indexing, cache warming).
+
+A job is a row in the jobs table, added in the same transaction as the change
+that needs it, so it exists exactly when that change committed. Every worker
+process runs a JobRunner that claims due jobs with a conditional UPDATE, runs
+at most JOB_CONCURRENCY at once and retries failures with exponential backoff.
+A claim holds a lease: if the process dies or restarts mid-job, the lease runs
+out and the job is claimed again, so handlers must be safe to run twice.
+
+    @job_handler("warm_cache")
+    async def warm_cache(payload: dict, data: bytes | None): ...
+
+    enqueue(db, "warm_cache", {"category_id": 3})  # then commit, then runner.notify()
+"""
+import asyncio
+import logging
+import os
+import random
+from collections import Counter
+from datetime import timedelta
+
+from sqlalchemy import and_, delete, func, or_, select, update
+
+from database import get_async_session_factory
+from models import Job, utcnow
+
+logger = logging.getLogger(__name__)
+
+JOBS_ENABLED = os.getenv("JOBS_ENABLED", "1") == "1"
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))  # seconds between polls when idle
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE = float(os.getenv("JOB_RETRY_BASE", "5"))  # first retry delay; doubles per attempt
+JOB_RETRY_MAX = float(os.getenv("JOB_RETRY_MAX", "600"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))  # longer than any job should take
+JOB_SHUTDOWN_GRACE = float(os.getenv("JOB_SHUTDOWN_GRACE", "10"))
+
+
+class JobHandler:
+    def __init__(self, kind: str, run, on_failure=None):
+        self.kind = kind
+        self.run = run
+        self.on_failure = on_failure  # async (payload, error), once retries are exhausted
+
+
+handlers: dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str, on_failure=None):
+    """Register an async (payload, data) function to run jobs of `kind`."""
+    def register(run):
+        handlers[kind] = JobHandler(kind, run, on_failure)
+        return run
+    return register
+
+
+def enqueue(db, kind: str, payload: dict, data: bytes | None = None, max_attempts: int = JOB_MAX_ATTEMPTS) -> Job:
+    """Add a job to `db`'s transaction; it becomes visible to runners on commit."""
+    job = Job(kind=kind, payload=payload, data=data, max_attempts=max_attempts)
+    db.add(job)
+    return job
+
+
+def retry_delay(attempts: int) -> float:
+    # Jittered so jobs that failed together (e.g. storage outage) do not retry together
+    return min(JOB_RETRY_MAX, JOB_RETRY_BASE * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+
+
+def claimable(now):
+    return or_(
+        and_(Job.status == "pending", Job.run_after <= now),
+        and_(Job.status == "running", Job.lease_expires_at < now),
+    )
+
+
+def claim_candidates_query(now, limit: int):
+    return select(Job.id).filter(claimable(now)).order_by(Job.run_after).limit(limit)
+
+
+class JobRunner:
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.counts = Counter()
+        self._wake: asyncio.Event | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._loop_task: asyncio.Task | None = None
+
+    def notify(self) -> None:
+        """Poll now instead of at the next interval, e.g. right after enqueueing."""
+        if self._wake is not None:
+            self._wake.set()
+
+    def start(self) -> None:
+        if self._loop_task is None:
+            # Created here so the event belongs to the loop the app runs on
+            self._wake = asyncio.Event()
+            self._loop_task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._loop_task is None:
+            return
+        self._loop_task.cancel()
+        self._loop_task = None
+        # Let running jobs finish; whatever is cut off is picked up again once its lease expires
+        if self._tasks:
+            _, unfinished = await asyncio.wait(self._tasks, timeout=JOB_SHUTDOWN_GRACE)
+            for task in unfinished:
+                task.cancel()
+
+    async def _run(self) -> None:
+        while True:
+            # Wait before each poll, the first included, so startup itself does not query
+            # the jobs table. Polling every JOB_POLL_INTERVAL finds jobs enqueued by other
+            # workers, retries coming due and expired leases; notify() cuts the wait short
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            free = self.concurrency - len(self._tasks)
+            if free <= 0:
+                continue
+            try:
+                jobs = await self._claim(free)
+            except Exception:
+                logger.exception("Claiming jobs failed")
+                continue
+            for job in jobs:
+                task = asyncio.create_task(self._execute(job))
+                self._tasks.add(task)
+                task.add_done_callback(self._done)
+            if len(jobs) == free:
+                self.notify()  # More may be waiting
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self.notify()  # A slot is free
+
+    async def _claim(self, limit: int) -> list:
+        now = utcnow()
+        async with get_async_session_factory()() as db:
+            candidates = (await db.execute(claim_candidates_query(now, limit))).scalars().all()
+
+            # The WHERE re-checks the state, so of several runners racing for a job only one gets a row back
+            claimed = []
+            for job_id in candidates:
+                row = (await db.execute(
+                    update(Job)
+                    .filter(Job.id == job_id, claimable(now))
+                    .values(
+                        status="running",
+                        attempts=Job.attempts + 1,
+                        lease_expires_at=now + timedelta(seconds=JOB_LEASE_SECONDS)
+                    )
+                    .returning(Job.id, Job.kind, Job.payload, Job.data, Job.attempts, Job.max_attempts)
+                    .execution_options(synchronize_session=False)
+                )).first()
+                if row is not None:
+                    claimed.append(row)
+            await db.commit()
+        self.counts["claimed"] += len(claimed)
+        return claimed
+
+    async def _execute(self, job) -> None:
+        handler = handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind {job.kind!r}")
+            await handler.run(job.payload, job.data)
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            await self._failed(job, handler, error)
+        else:
+            await self._finish(job)
+
+    async def _finish(self, job) -> None:
+        # Finished jobs are deleted; only failures stay in the table for inspection
+        async with get_async_session_factory()() as db:
+            await db.execute(delete(Job).filter(Job.id == job.id))
+            await db.commit()
+        self.counts["succeeded"] += 1
+
+    async def _failed(self, job, handler: JobHandler | None, error: Exception) -> None:
+        final = job.attempts >= job.max_attempts
+        logger.warning("Job %s (%s) failed, attempt %s of %s", job.id, job.kind, job.attempts, job.max_attempts,
+                       exc_info=error)
+        if final:
+            values = {"status": "failed"}
+        else:
+            values = {"status": "pending", "run_after": utcnow() + timedelta(seconds=retry_delay(job.attempts))}
+        async with get_async_session_factory()() as db:
+            await db.execute(
+                update(Job)
+                .filter(Job.id == job.id)
+                .values(lease_expires_at=None, last_error=repr(error)[:2000], **values)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+        self.counts["failed" if final else "retried"] += 1
+        if final and handler is not None and handler.on_failure is not None:
+            try:
+                await handler.on_failure(job.payload, error)
+            except Exception:
+                logger.exception("on_failure for job %s (%s) failed", job.id, job.kind)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": JOBS_ENABLED,
+            "concurrency": self.concurrency,
+            "running": len(self._tasks),
+            **self.counts,
+        }
+
+
+runner = JobRunner(JOB_CONCURRENCY)
+
+
+async def job_stats(db) -> dict:
+    queued = dict((await db.execute(select(Job.status, func.count(Job.id)).group_by(Job.status))).all())
+    return {"queued": queued, "runner": runner.stats()}
@@ -0,0 +1,138 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+load_dotenv()
+
+# Configured entirely from the environment
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")            # "json" or "text"
+ACCESS_LOG = os.getenv("ACCESS_LOG", "1") == "1"
+SQL_LOG_SAMPLE_RATE = float(os.getenv("SQL_LOG_SAMPLE_RATE", "0"))  # 0.0 - 1.0
+
+# Correlation id of the request being handled ("-" outside a request)
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+logger = logging.getLogger("fudo.request")
+sql_logger = logging.getLogger("fudo.sql")
+
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    # Attributes every LogRecord has; anything else was passed through `extra=`
+    _reserved = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "request_id"}
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in self._reserved})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging() -> None:
+    """Route all logging through a queue so request handlers never wait on stdout."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    # The filter runs on the calling thread, where the request context is visible
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class RequestContextMiddleware:
+    """Assigns each request a correlation id (X-Request-ID) and writes one access line."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if ACCESS_LOG:
+                logger.info("request", extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                })
+            request_id_var.reset(token)
+
+
+def install_sql_logging(engine) -> None:
+    """Log a random sample of SQL statements with their duration (replaces echo=True)."""
+    if SQL_LOG_SAMPLE_RATE <= 0:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _sample(conn, cursor, statement, parameters, context, executemany):
+        if random.random() < SQL_LOG_SAMPLE_RATE:
+            conn.info["sql_log_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _log(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("sql_log_start", None)
+        if start is not None:
+            sql_logger.info("sql", extra={
+                "statement": statement,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+            })
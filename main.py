@@ -1,34 +1,88 @@
 
-from fastapi import  HTTPException, Depends
-from passlib.context import CryptContext
+from fastapi import  HTTPException, Depends, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.middleware.cors import CORSMiddleware
-
-from database import get_db
+from starlette.responses import JSONResponse
+from starlette.staticfiles import StaticFiles
+
+import jobs
+import passwords
+from db_pool import PoolTimeoutError, pool_exhausted
+from admin import image_pipeline
+from catalog_snapshot import get_snapshot
+from database import dispose_engines, get_async_db, get_async_engine, get_db, replica_health_loop, replicas
+from passwords import hash_password
+from rate_limit import signup_limiter
 from models import User
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import  FastAPI
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from router.auth import get_current_user
+from router.auth import get_current_user, invalidate_user
 from router.user_api import router as user_router
 from router.login_api import router as login_router
 from admin.router.add_product import router  as add_product
 from admin.router.add_category import  router as add_category
+from admin.router.import_products import router as import_products
+from admin.storage import LOCAL_STORAGE_DIR, STORAGE_BACKEND
 from router.cart_api import  router as cart
+from router.order_api import router as orders
 
 from schema import UserCreate
 from dotenv import load_dotenv
+import logging
 import os
+from logging_config import RequestContextMiddleware, configure_logging
+from query_metrics import QueryMetricsMiddleware
 from router.profile import router as profile_router
+from router.metrics_api import router as metrics_router
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Open a DB connection, load the password hasher and build the catalog snapshot
+# before taking traffic, instead of on the first request that needs them
+WARM_START = os.getenv("WARM_START", "0") == "1"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The DB engines, password context, image workers and Firebase are created
+    # lazily on first use; the lifespan only (optionally) warms and releases them
+    if WARM_START:
+        async with get_async_engine().connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        passwords.get_pwd_context()
+        await get_snapshot()
+    health_task = asyncio.create_task(replica_health_loop()) if replicas else None
+    if jobs.JOBS_ENABLED:
+        jobs.runner.start()
+    yield
+    if health_task:
+        health_task.cancel()
+    await jobs.runner.stop()
+    await dispose_engines()
+    passwords.shutdown()
+    image_pipeline.shutdown()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    # Pool exhaustion outside a session dependency: same 503 the dependencies return
+    error = pool_exhausted()
+    return JSONResponse(status_code=error.status_code, content={"detail": error.detail}, headers=error.headers)
 
 
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Change this to specific domains in production
@@ -36,15 +90,26 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(QueryMetricsMiddleware)
+app.add_middleware(RequestContextMiddleware)
 
 
+app.include_router(import_products)
 app.include_router(add_product)
 app.include_router(user_router)
 app.include_router(profile_router)
 app.include_router(add_category)
 app.include_router(cart)
+app.include_router(orders)
+app.include_router(metrics_router)
 
 app.include_router(login_router)
+
+# Serve locally stored product images when running without Firebase
+if STORAGE_BACKEND == "local":
+    os.makedirs(LOCAL_STORAGE_DIR, exist_ok=True)
+    app.mount("/media", StaticFiles(directory=LOCAL_STORAGE_DIR), name="media")
+
 @app.get("/")
 def read_root():
     return {"message": "Hello, World!"}
@@ -57,26 +122,26 @@ def read_root():
 
 
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
 @app.get("/test-db")
 def test_db(db: Session = Depends(get_db)):
     return {"message": "DB connection is working"}
 
 
 @app.post("/users/", response_model=dict)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, request: Request, db: AsyncSession = Depends(get_async_db)):
+    await signup_limiter.check(request, identifier=user.email)
     try:
-        existing_user = db.query(User).filter(
-            (User.email == user.email) | (User.phone == user.phone)
-        ).first()
+        existing_user = (await db.execute(
+            select(User.id).filter((User.email == user.email) | (User.phone == user.phone))
+        )).first()
+        # Hand the connection back to the pool before the slow bcrypt hash
+        await db.rollback()
 
         if existing_user:
             raise HTTPException(status_code=400, detail="Email or phone number already registered")
 
         # Hash password before saving
-        hashed_password = hash_password(user.password)
+        hashed_password = await hash_password(user.password)
 
         # Create new user
         new_user = User(
@@ -87,8 +152,8 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
         )
 
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        invalidate_user(new_user.id)
 
         return {
             "id": new_user.id,
@@ -97,8 +162,10 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
             "phone": new_user.phone
         }
 
+    except (HTTPException, PoolTimeoutError):
+        raise
     except Exception as e:
-        print(f"🔥 Error: {e}")  # Debugging log
+        logger.exception("User creation failed")
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
 
@@ -0,0 +1,95 @@
+"""Versioned schema migrations.
+
+Each module in migrations/versions defines VERSION (a unique increasing int),
+DESCRIPTION and upgrade(conn). Pending versions run in order, each in its own
+transaction together with its row in schema_migrations, so a failed step can
+simply be re-run. Steps are written to be safe on databases that create_all
+already brought up to date.
+
+    python migrations/runner.py            # apply pending migrations
+    python migrations/runner.py --status   # list applied / pending versions
+"""
+import argparse
+import importlib
+import logging
+import os
+import pkgutil
+import sys
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, text
+
+logger = logging.getLogger(__name__)
+
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+VERSIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "versions")
+
+
+def load_migrations() -> list:
+    modules = [
+        importlib.import_module(f"migrations.versions.{info.name}")
+        for info in pkgutil.iter_modules([VERSIONS_DIR])
+    ]
+    modules.sort(key=lambda module: module.VERSION)
+    versions = [module.VERSION for module in modules]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return modules
+
+
+def applied_versions(engine) -> set:
+    migration_metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def run_migrations(engine) -> list:
+    """Apply every pending migration; returns the versions that ran."""
+    done = applied_versions(engine)
+    ran = []
+    for module in load_migrations():
+        if module.VERSION in done:
+            continue
+        logger.info("Applying migration %s: %s", module.VERSION, module.DESCRIPTION)
+        with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                # The app engines carry DB_STATEMENT_TIMEOUT_MS; index builds and backfills may run far longer
+                conn.execute(text("SET LOCAL statement_timeout = 0"))
+            module.upgrade(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=module.VERSION,
+                description=module.DESCRIPTION,
+                applied_at=datetime.utcnow()
+            ))
+        ran.append(module.VERSION)
+    return ran
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from database import engine
+    from logging_config import configure_logging
+
+    configure_logging()
+
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("--status", action="store_true", help="list migrations without applying them")
+    args = parser.parse_args()
+
+    if args.status:
+        done = applied_versions(engine)
+        for module in load_migrations():
+            state = "applied" if module.VERSION in done else "pending"
+            print(f"{module.VERSION:>4}  {state:<8} {module.DESCRIPTION}")
+    else:
+        ran = run_migrations(engine)
+        print(f"Applied {len(ran)} migration(s).")
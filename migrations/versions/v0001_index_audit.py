@@ -0,0 +1,50 @@
+from sqlalchemy import inspect, text
+
+VERSION = 1
+DESCRIPTION = "Index audit: cart/product lookup indexes, drop unused user and id indexes"
+
+# Never used by a query, and each one costs a write on every insert/update
+UNUSED_INDEXES = [
+    "ix_users_name",
+    "ix_users_password",
+    # Duplicates of the primary key indexes
+    "ix_users_id",
+    "ix_products_id",
+    "ix_categories_id",
+    "ix_carts_id",
+]
+
+
+def has_unique_cart_key(conn) -> bool:
+    inspector = inspect(conn)
+    wanted = ["user_id", "product_id"]
+    if any(c["column_names"] == wanted for c in inspector.get_unique_constraints("carts")):
+        return True
+    return any(i["unique"] and i["column_names"] == wanted for i in inspector.get_indexes("carts"))
+
+
+def upgrade(conn):
+    for name in UNUSED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+    if not has_unique_cart_key(conn):
+        # Fold duplicate (user, product) rows into the oldest one before enforcing uniqueness
+        conn.execute(text("""
+            UPDATE carts SET quantity = (
+                SELECT SUM(dup.quantity) FROM carts dup
+                WHERE dup.user_id = carts.user_id AND dup.product_id = carts.product_id
+            )
+            WHERE id IN (
+                SELECT MIN(id) FROM carts GROUP BY user_id, product_id HAVING COUNT(*) > 1
+            )
+        """))
+        conn.execute(text("""
+            DELETE FROM carts WHERE id NOT IN (
+                SELECT MIN(id) FROM carts GROUP BY user_id, product_id
+            )
+        """))
+        conn.execute(text("CREATE UNIQUE INDEX uq_carts_user_product ON carts (user_id, product_id)"))
+
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_carts_product_id ON carts (product_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_products_category_id_id ON products (category_id, id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_products_price_id ON products (price, id)"))
@@ -0,0 +1,52 @@
+from sqlalchemy import text
+
+VERSION = 2
+DESCRIPTION = "Product search: tsvector + trigram indexes (PostgreSQL), FTS5 table and triggers (SQLite)"
+
+# product_search.py repeats this expression verbatim so the planner can use the index
+SEARCH_DOCUMENT = "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))"
+
+
+def upgrade_postgresql(conn):
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_products_search_document ON products USING gin ({SEARCH_DOCUMENT})"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (lower(name) gin_trgm_ops)"))
+
+
+def upgrade_sqlite(conn):
+    # External-content FTS5 table: stores only the index, rows stay in products
+    conn.execute(text("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+            name, description, content='products', content_rowid='id', prefix='2 3'
+        )
+    """))
+    # Its vocabulary, used to expand misspelled terms
+    conn.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS products_fts_vocab USING fts5vocab(products_fts, 'row')"))
+
+    # Triggers keep the index current for every write path, including bulk imports
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name, description ON products BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+        END
+    """))
+    conn.execute(text("INSERT INTO products_fts (products_fts) VALUES ('rebuild')"))
+
+
+def upgrade(conn):
+    if conn.dialect.name == "postgresql":
+        upgrade_postgresql(conn)
+    elif conn.dialect.name == "sqlite":
+        upgrade_sqlite(conn)
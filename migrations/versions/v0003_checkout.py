@@ -0,0 +1,44 @@
+from sqlalchemy import (
+    Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table, UniqueConstraint, func, inspect, text,
+)
+
+VERSION = 3
+DESCRIPTION = "Checkout: products.stock, orders and order_items"
+
+# Frozen copies of the tables as this migration creates them; later model edits need their own migration
+metadata = MetaData()
+
+# Referenced tables, declared only so the foreign keys resolve; never created here
+Table("users", metadata, Column("id", Integer, primary_key=True))
+Table("products", metadata, Column("id", Integer, primary_key=True))
+
+orders = Table(
+    "orders",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("idempotency_key", String(255), nullable=False),
+    Column("status", String, nullable=False),
+    Column("total", Float, nullable=False),
+    Column("created_at", DateTime, nullable=False, server_default=func.now()),
+    UniqueConstraint("user_id", "idempotency_key", name="uq_orders_user_idempotency_key"),
+)
+
+order_items = Table(
+    "order_items",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("order_id", Integer, ForeignKey("orders.id"), nullable=False),
+    Column("product_id", Integer, ForeignKey("products.id"), nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("price", Float, nullable=False),
+    Index("ix_order_items_order_id", "order_id"),
+)
+
+
+def upgrade(conn):
+    columns = {column["name"] for column in inspect(conn).get_columns("products")}
+    if "stock" not in columns:
+        conn.execute(text("ALTER TABLE products ADD COLUMN stock INTEGER"))
+
+    metadata.create_all(conn, tables=[orders, order_items], checkfirst=True)
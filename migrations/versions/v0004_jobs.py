@@ -0,0 +1,34 @@
+from sqlalchemy import (
+    JSON, Column, DateTime, Index, Integer, LargeBinary, MetaData, String, Table, Text, inspect, text,
+)
+
+VERSION = 4
+DESCRIPTION = "Background jobs: jobs table, products.image_status"
+
+# Frozen copy of the table as this migration creates it
+metadata = MetaData()
+
+jobs = Table(
+    "jobs",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("kind", String(100), nullable=False),
+    Column("payload", JSON, nullable=False),
+    Column("data", LargeBinary, nullable=True),
+    Column("status", String(20), nullable=False),
+    Column("attempts", Integer, nullable=False),
+    Column("max_attempts", Integer, nullable=False),
+    Column("run_after", DateTime, nullable=False),
+    Column("lease_expires_at", DateTime, nullable=True),
+    Column("last_error", Text, nullable=True),
+    Column("created_at", DateTime, nullable=False),
+    Index("ix_jobs_status_run_after", "status", "run_after"),
+)
+
+
+def upgrade(conn):
+    columns = {column["name"] for column in inspect(conn).get_columns("products")}
+    if "image_status" not in columns:
+        conn.execute(text("ALTER TABLE products ADD COLUMN image_status VARCHAR"))
+
+    metadata.create_all(conn, checkfirst=True)
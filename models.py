@@ -1,4 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    JSON, Column, DateTime, Integer, LargeBinary, String, Text, Float, ForeignKey, Index, UniqueConstraint, func
+)
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -6,11 +10,11 @@ from database import Base
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
     email = Column(String, unique=True, index=True)
     phone = Column(String, unique=True, index=True)  # Added phone field
-    password = Column(String, index=True)
+    password = Column(String)
 
     cart = relationship("Cart", back_populates="user", cascade="all, delete-orphan")
 
@@ -18,8 +22,15 @@ class User(Base):
 
 class Cart(Base):
     __tablename__ = "carts"
+    __table_args__ = (
+        # One row per (user, product); cart upserts use it as their conflict target,
+        # and as a (user_id, ...) prefix it also serves every per-user cart lookup
+        UniqueConstraint("user_id", "product_id", name="uq_carts_user_product"),
+        # Product deletes cascade into carts by product_id
+        Index("ix_carts_product_id", "product_id"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'))  # Assuming users table
     product_id = Column(Integer, ForeignKey('products.id'))  # Linking to products
     quantity = Column(Integer, default=1)
@@ -29,5 +40,55 @@ class Cart(Base):
     product = relationship("Product", back_populates="cart")
 
 
+class Order(Base):
+    __tablename__ = "orders"
+    __table_args__ = (
+        # A retried checkout with the same key finds the order instead of creating another
+        UniqueConstraint("user_id", "idempotency_key", name="uq_orders_user_idempotency_key"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    idempotency_key = Column(String(255), nullable=False)
+    status = Column(String, nullable=False, default="placed")
+    total = Column(Float, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+
+
+class OrderItem(Base):
+    __tablename__ = "order_items"
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    price = Column(Float, nullable=False)  # Unit price charged at checkout
+
+    order = relationship("Order", back_populates="items")
+
+
+def utcnow() -> datetime:
+    # Naive UTC, compared against job timestamps in Python on every backend
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # The runner's claim query: due pending jobs, and running ones whose lease ran out
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
 
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    data = Column(LargeBinary, nullable=True)  # Bulky input such as an uploaded image
+    status = Column(String(20), nullable=False, default="pending")  # pending, running or failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=utcnow)
+    lease_expires_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=utcnow)
@@ -0,0 +1,107 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from fastapi import HTTPException
+from starlette import status
+
+# bcrypt cost factor; hashes below it are upgraded on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# bcrypt releases the GIL, so a small thread pool runs hashes in parallel without
+# blocking the event loop or holding a DB connection while it works
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hashes running or queued at once per process. The pool bounds the parallel
+# work; this bounds the queue in front of it to about 4 s at the default cost
+# (~250 ms a hash), so a burst is served and only a real overload gets a 503
+MAX_PASSWORD_CHECKS = int(os.getenv("MAX_PASSWORD_CHECKS", str(PASSWORD_HASH_WORKERS * 16)))
+
+_pwd_context = None
+_executor = None
+
+
+def get_pwd_context():
+    """The single password context shared by signup and login, built on first use."""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        _pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__rounds=BCRYPT_ROUNDS,
+            bcrypt__min_rounds=BCRYPT_ROUNDS,
+        )
+    return _pwd_context
+
+
+class ConcurrencyCap:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.rejected = 0
+
+    @contextmanager
+    def hold(self):
+        """One slot for the enclosed work; 503 with Retry-After right away when all are taken."""
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy. Try again shortly.",
+                headers={"Retry-After": "1"},
+            )
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {"limit": self.limit, "in_flight": self.in_flight, "rejected": self.rejected}
+
+
+password_checks = ConcurrencyCap(MAX_PASSWORD_CHECKS)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+
+def configure_pool(max_workers: int) -> None:
+    """Replace the hashing pool with one of `max_workers` threads."""
+    global _executor
+    old, _executor = _executor, ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+    if old is not None:
+        old.shutdown(wait=False)
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+async def _run(func, *args):
+    # Only the hash itself takes a slot; the route's lookups and rejections do not
+    with password_checks.hold():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), func, *args)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(get_pwd_context().hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Check a password off the event loop.
+
+    Returns (valid, new_hash); new_hash is set when the stored hash uses an
+    outdated scheme or cost and should be replaced.
+    """
+    return await _run(get_pwd_context().verify_and_update, plain_password, hashed_password)
@@ -0,0 +1,101 @@
+"""Ranked, typo-tolerant prefix search over product names and descriptions.
+
+PostgreSQL matches a tsvector prefix query, or a trigram word similarity
+on the name for misspellings. Both are backed by the GIN indexes from
+migration 2. SQLite uses the FTS5 table from the same migration. There,
+terms are prefix-matched, and misspelled terms are expanded to nearby
+words from the index vocabulary. Both backends return a subquery of
+(id, score), where a higher score is a better match.
+"""
+import re
+
+from sqlalchemy import Float, Integer, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+MAX_TERMS = 8
+MAX_TYPO_CANDIDATES = 10
+
+# Must match the expression of ix_products_search_document (migration 2)
+SEARCH_DOCUMENT = "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))"
+
+
+def search_terms(q: str) -> list:
+    return re.findall(r"\w+", q.lower())[:MAX_TERMS]
+
+
+def max_edits(term: str) -> int:
+    # Short terms get no typo allowance, otherwise almost anything would match
+    if len(term) < 4:
+        return 0
+    return 1 if len(term) <= 7 else 2
+
+
+def edit_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def prefix_distance(term: str, word: str, edits: int) -> int:
+    """Edit distance between term and the closest prefix of word."""
+    lengths = range(max(1, len(term) - edits), len(term) + edits + 1)
+    return min(edit_distance(term, word[:length]) for length in lengths)
+
+
+async def fts5_term(db: AsyncSession, term: str) -> str:
+    edits = max_edits(term)
+    if not edits:
+        return f'"{term}"*'
+
+    # Vocabulary rows are ordered by term, so this reads only one letter's range
+    words = (await db.execute(
+        text("SELECT term FROM products_fts_vocab WHERE term >= :low AND term < :high"),
+        {"low": term[0], "high": chr(ord(term[0]) + 1)},
+    )).scalars()
+    candidates = sorted(
+        (distance, word)
+        for word in words
+        if len(word) >= len(term) - edits
+        if (distance := prefix_distance(term, word, edits)) <= edits
+    )
+    alternatives = [f'"{term}"*'] + [f'"{word}"' for _, word in candidates[:MAX_TYPO_CANDIDATES]]
+    return "(" + " OR ".join(alternatives) + ")"
+
+
+async def sqlite_matches(db: AsyncSession, terms: list):
+    match = " AND ".join([await fts5_term(db, term) for term in terms])
+    # bm25 is lower-is-better; name hits weigh ten times description hits
+    return (
+        text(
+            "SELECT rowid AS id, -bm25(products_fts, 10.0, 1.0) AS score "
+            "FROM products_fts WHERE products_fts MATCH :match"
+        )
+        .bindparams(match=match)
+        .columns(id=Integer, score=Float)
+    )
+
+
+def postgresql_matches(q: str, terms: list):
+    return (
+        text(
+            f"SELECT id, ts_rank({SEARCH_DOCUMENT}, query) + word_similarity(:q, lower(name)) AS score "
+            "FROM products, to_tsquery('simple', :tsquery) AS query "
+            f"WHERE {SEARCH_DOCUMENT} @@ query OR :q <% lower(name)"
+        )
+        .bindparams(q=q.lower(), tsquery=" & ".join(f"{term}:*" for term in terms))
+        .columns(id=Integer, score=Float)
+    )
+
+
+async def search_matches(db: AsyncSession, q: str):
+    """Subquery of (id, score) for products matching q, or None if q has no terms."""
+    terms = search_terms(q)
+    if not terms:
+        return None
+    if db.bind.dialect.name == "postgresql":
+        return postgresql_matches(q, terms).subquery("matches")
+    return (await sqlite_matches(db, terms)).subquery("matches")
@@ -0,0 +1,190 @@
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# A statement shape repeated this many times in one request is reported as N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is +Inf)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_placeholder_list = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*,?)+\)")
+_whitespace = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Collapse whitespace and IN/VALUES placeholder lists so repeats compare equal."""
+    return _placeholder_list.sub("(?)", _whitespace.sub(" ", statement).strip())
+
+
+class RequestStats:
+    """SQL activity of one request (or one `assert_query_budget` block)."""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.query_count = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.query_count += 1
+        self.db_time += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> list:
+        return [(shape, count) for shape, count in self.shapes.items() if count >= threshold]
+
+
+current_stats: ContextVar[RequestStats | None] = ContextVar("current_stats", default=None)
+
+
+def install_query_instrumentation(engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("query_start", None)
+        stats = current_stats.get()
+        if stats is not None and start is not None:
+            stats.record(statement, time.perf_counter() - start)
+
+
+class Histogram:
+    def __init__(self, buckets_ms: tuple = LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.total = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect_left(self.buckets_ms, value_ms)] += 1
+        self.total += value_ms
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{bound}" for bound in self.buckets_ms] + ["le_inf"]
+        return {"buckets": dict(zip(labels, self.counts)), "sum_ms": round(self.total, 3)}
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.n_plus_one = 0
+        self.latency = Histogram()
+        self.db_time = Histogram()
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "avg_queries": round(self.queries / self.requests, 2) if self.requests else 0,
+            "max_queries": self.max_queries,
+            "n_plus_one": self.n_plus_one,
+            "latency_ms": self.latency.snapshot(),
+            "db_time_ms": self.db_time.snapshot(),
+        }
+
+
+_routes: dict[str, RouteMetrics] = {}
+_routes_lock = threading.Lock()
+_captures: list[list] = []
+
+
+def record_request(stats: RequestStats, elapsed: float) -> None:
+    repeated = stats.repeated(N_PLUS_ONE_THRESHOLD)
+    if repeated:
+        logger.warning("Possible N+1 query", extra={"route": stats.route, "repeated": repeated})
+    with _routes_lock:
+        metrics = _routes.setdefault(stats.route, RouteMetrics())
+        metrics.requests += 1
+        metrics.queries += stats.query_count
+        metrics.max_queries = max(metrics.max_queries, stats.query_count)
+        metrics.n_plus_one += bool(repeated)
+        metrics.latency.observe(elapsed * 1000)
+        metrics.db_time.observe(stats.db_time * 1000)
+    for captured in _captures:
+        captured.append(stats)
+
+
+def query_metrics_snapshot() -> dict:
+    with _routes_lock:
+        return {route: metrics.snapshot() for route, metrics in sorted(_routes.items())}
+
+
+class QueryMetricsMiddleware:
+    """Counts SQL per request, adds a Server-Timing header and feeds the per-route metrics."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(f"{scope['method']} <unmatched>")
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timing = (
+                    f'db;dur={stats.db_time * 1000:.2f};desc="{stats.query_count} queries", '
+                    f"app;dur={(time.perf_counter() - start) * 1000:.2f}"
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", timing.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_stats.reset(token)
+            # Aggregate by route template (/products/{product_id}), never by raw path
+            route = scope.get("route")
+            if route is not None:
+                stats.route = f"{scope['method']} {route.path}"
+            record_request(stats, time.perf_counter() - start)
+
+
+@contextmanager
+def assert_query_budget(max_queries: int, max_repeats: int | None = None):
+    """Test helper: fail if any request handled inside the block issues more than
+    `max_queries` statements, or repeats one statement shape `max_repeats` times.
+
+        with assert_query_budget(3):
+            client.get("/products/", headers=auth)
+    """
+    max_repeats = max_repeats or N_PLUS_ONE_THRESHOLD
+    captured = []
+    _captures.append(captured)
+    # Also covers code awaited directly in the block, outside any request
+    direct = RequestStats("<direct>")
+    token = current_stats.set(direct)
+    try:
+        yield captured
+    finally:
+        current_stats.reset(token)
+        _captures.remove(captured)
+
+    for stats in [direct, *captured]:
+        if stats.query_count > max_queries:
+            raise AssertionError(
+                f"{stats.route} issued {stats.query_count} queries (budget {max_queries}): "
+                f"{dict(stats.shapes)}"
+            )
+        repeated = stats.repeated(max_repeats)
+        if repeated:
+            raise AssertionError(f"{stats.route} repeated statements (N+1?): {repeated}")
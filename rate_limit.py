@@ -0,0 +1,193 @@
+"""Rate limiting for the bcrypt-backed endpoints (login and signup).
+
+Token buckets keyed by client IP and by identifier (email / phone), checked
+before any DB or bcrypt work. A bucket holds `capacity` tokens and refills
+continuously over `period` seconds. An empty bucket means 429 with
+Retry-After. The cap on concurrent password checks lives in passwords.py,
+around the hash itself.
+
+Buckets live in process memory by default. RATE_LIMIT_BACKEND=redis shares
+them between workers and dynos through an atomic Lua script (needs the
+`redis` package). If the shared backend is down, requests are let through
+rather than locking everyone out.
+"""
+import hashlib
+import logging
+import math
+import os
+import time
+from collections import Counter
+
+from fastapi import HTTPException, Request
+from starlette import status
+
+from cache import TTLCache
+from passwords import password_checks
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" or "redis"
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Set to 1 only behind a proxy that appends X-Forwarded-For (e.g. the platform
+# router): the socket peer is then the proxy, and the client is the last entry,
+# the one the proxy wrote. Without such a proxy the header is whatever the
+# client sent, so trusting it would let anyone pick the IP they are limited as
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "0") == "1"
+
+
+class RateLimit:
+    def __init__(self, name: str, capacity: int, period: float):
+        self.name = name
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period  # tokens per second
+
+    @classmethod
+    def from_env(cls, name: str, variable: str, default: str) -> "RateLimit":
+        # "<requests>/<seconds>", e.g. "10/60"
+        capacity, period = os.getenv(variable, default).split("/")
+        return cls(name, int(capacity), float(period))
+
+
+class MemoryBackend:
+    """Per-process buckets. A bucket that has refilled completely is dropped, so idle keys cost nothing."""
+
+    def __init__(self, maxsize: int):
+        self._buckets = TTLCache(maxsize=maxsize)
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        """Take one token; returns 0 when allowed, else seconds until a token is available."""
+        # No await between the read and the write, so this is atomic on the event loop
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (limit.capacity, now))
+        tokens = min(limit.capacity, tokens + (now - updated) * limit.rate)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / limit.rate
+        self._buckets.set(key, (tokens, now), expires_at=time.time() + (limit.capacity - tokens) / limit.rate)
+        return retry_after
+
+
+class RedisBackend:
+    """Buckets shared by every worker, updated atomically by a Lua script."""
+
+    SCRIPT = """
+        local capacity = tonumber(ARGV[1])
+        local rate = tonumber(ARGV[2])
+        local clock = redis.call('TIME')
+        local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+        local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+        local tokens = tonumber(state[1]) or capacity
+        local updated = tonumber(state[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+        local retry_after = 0
+        if tokens >= 1 then
+            tokens = tokens - 1
+        else
+            retry_after = (1 - tokens) / rate
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+        redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+        return tostring(retry_after)
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(self.SCRIPT)
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        return float(await self._script(keys=[f"ratelimit:{key}"], args=[limit.capacity, limit.rate]))
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        if RATE_LIMIT_BACKEND == "redis":
+            _backend = RedisBackend(RATE_LIMIT_REDIS_URL)
+        else:
+            _backend = MemoryBackend(RATE_LIMIT_MAX_KEYS)
+    return _backend
+
+
+def set_backend(backend) -> None:
+    """Plug in any object with `async take(key, limit) -> retry_after_seconds`."""
+    global _backend
+    _backend = backend
+
+
+def client_ip(request: Request) -> str:
+    if TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.rsplit(",", 1)[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def identifier_key(identifier: str) -> str:
+    # Hashed so emails and phone numbers never end up in the shared backend
+    return hashlib.sha256(identifier.strip().lower().encode()).hexdigest()[:32]
+
+
+class RateLimiter:
+    def __init__(self, name: str, per_ip: RateLimit, per_identifier: RateLimit):
+        self.name = name
+        self.per_ip = per_ip
+        self.per_identifier = per_identifier
+        self.rejected = Counter()
+
+    async def check(self, request: Request, identifier: str | None = None) -> None:
+        """Raise 429 (with Retry-After) when the client or the identifier is over its limit."""
+        rules = [(self.per_ip, client_ip(request))]
+        if identifier:
+            rules.append((self.per_identifier, identifier_key(identifier)))
+
+        for limit, key in rules:
+            try:
+                retry_after = await get_backend().take(f"{self.name}:{limit.name}:{key}", limit)
+            except Exception:
+                logger.warning("Rate limit backend unavailable; allowing request", exc_info=True)
+                return
+            if retry_after > 0:
+                self.rejected[limit.name] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many attempts. Try again later.",
+                    headers={"Retry-After": str(math.ceil(retry_after))},
+                )
+
+    def stats(self) -> dict:
+        return {
+            "per_ip": f"{self.per_ip.capacity}/{self.per_ip.period:g}s",
+            "per_identifier": f"{self.per_identifier.capacity}/{self.per_identifier.period:g}s",
+            "rejected": dict(self.rejected),
+        }
+
+
+login_limiter = RateLimiter(
+    "login",
+    per_ip=RateLimit.from_env("ip", "LOGIN_RATE_PER_IP", "30/60"),
+    per_identifier=RateLimit.from_env("identifier", "LOGIN_RATE_PER_IDENTIFIER", "10/300"),
+)
+signup_limiter = RateLimiter(
+    "signup",
+    per_ip=RateLimit.from_env("ip", "SIGNUP_RATE_PER_IP", "10/3600"),
+    per_identifier=RateLimit.from_env("identifier", "SIGNUP_RATE_PER_IDENTIFIER", "3/3600"),
+)
+
+
+def rate_limit_stats() -> dict:
+    return {
+        "backend": RATE_LIMIT_BACKEND,
+        "login": login_limiter.stats(),
+        "signup": signup_limiter.stats(),
+        "password_checks": password_checks.stats(),
+    }
@@ -0,0 +1,74 @@
+import hashlib
+import os
+
+import orjson
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from cache import TTLCache
+
+
+class CachedResponse:
+    """A serialized JSON body with its strong ETag."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+    def matches(self, if_none_match: str | None) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses weak comparison, so W/"x" matches "x"
+        candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+        return self.etag in candidates
+
+    def to_response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """Serialized read responses, versioned so one bump invalidates them all.
+
+    Entries are keyed by (version, key). A response built while a write
+    bumps the version is stored under the old version and is never served.
+    invalidate() only reaches this process, so entries also expire after
+    `ttl` seconds; that bounds how long other workers serve a stale answer.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self.version = 0
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def lookup(self, key) -> CachedResponse | None:
+        return self._entries.get((self.version, key))
+
+    def store(self, key, version: int, content) -> CachedResponse:
+        if isinstance(content, BaseModel):
+            # pydantic-core's compiled serializer writes the bytes directly
+            body = content.model_dump_json().encode()
+        else:
+            body = orjson.dumps(jsonable_encoder(content))
+        cached = CachedResponse(body)
+        self._entries.set((version, key), cached)
+        return cached
+
+    def invalidate(self) -> None:
+        self.version += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"version": self.version, **self._entries.stats()}
+
+
+# Categories and product detail; invalidated by the admin catalog write paths in this
+# worker, and expired after CATALOG_CACHE_TTL seconds for writes made through other workers
+catalog_cache = ResponseCache(
+    maxsize=int(os.getenv("CATALOG_CACHE_SIZE", "5000")),
+    ttl=float(os.getenv("CATALOG_CACHE_TTL", "30"))
+)
@@ -1,8 +1,12 @@
+import hashlib
+
 from fastapi import Depends, HTTPException
 from jose import jwt, JWTError
 from fastapi.security import OAuth2PasswordBearer
-from database import get_db
+from cache import TTLCache
+from database import get_async_db, get_db
 from models import User
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import os
 
@@ -11,27 +15,81 @@ ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Authenticated user rows keyed by token `sub`, and decoded tokens keyed by token hash.
+# Cached users are expunged from their session so later commits/rollbacks never expire them.
+user_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "300"))
+)
+token_cache = TTLCache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "10000")))
+
+
+def decode_token(token: str) -> dict:
+    """Decode a JWT, reusing the payload until the token's own `exp`."""
+    key = hashlib.sha256(token.encode()).hexdigest()
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        token_cache.set(key, payload, expires_at=payload.get("exp"))
+    return payload
+
+
+def invalidate_user(user_id) -> None:
+    """Forget a cached user (and their decoded tokens) after it is created or changed."""
+    sub = str(user_id)
+    user_cache.pop(sub)
+    token_cache.discard_where(lambda payload: payload.get("sub") == sub)
+
+
+def auth_cache_stats() -> dict:
+    return {"users": user_cache.stats(), "tokens": token_cache.stats()}
+
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         user_id = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
 
-        user = db.query(User).filter(User.id == user_id).first()
+        user = user_cache.get(user_id)
         if user is None:
-            raise HTTPException(status_code=404, detail="User not found")
+            user = db.query(User).filter(User.id == user_id).first()
+            if user is None:
+                raise HTTPException(status_code=404, detail="User not found")
+            db.expunge(user)
+            user_cache.set(user_id, user)
 
         return user
 
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    try:
+        payload = decode_token(token)
+        user_id = payload.get("sub")
+        if user_id is None:
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+        user = user_cache.get(user_id)
+        if user is None:
+            user = await db.get(User, int(user_id))
+            if user is None:
+                raise HTTPException(status_code=404, detail="User not found")
+            db.expunge(user)
+            user_cache.set(user_id, user)
+
+        return user
+
+    except (JWTError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid token")
+
 ADMIN_IDS = {"121511"}
 
 def check_admin(token: str = Depends(oauth2_scheme)):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         user_id = payload.get("sub")  # Extract user ID from the token
 
         if user_id is None:
@@ -1,153 +1,255 @@
+from typing import Union
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from schemas.cart_schema import CartItemResponse, CartItemCreate, CartItemUpdate
+from schemas.cart_schema import (
+    CartBulkUpdate, CartItemCreate, CartItemUpdate, CartItemsResponse, CartMutationResponse, CartSummary
+)
 from admin_model import Product
-from database import get_db
+from database import dialect_insert, get_async_db, get_async_read_db
 from models import Cart
-from router.auth import get_current_user  # Assuming check_admin is the dependency for checking JWT auth
+from router.auth import get_current_user_async  # Assuming check_admin is the dependency for checking JWT auth
 
 router = APIRouter(prefix="/cart", tags=["Cart"])
 
+# Lets a client refresh its badge and subtotal from the mutation response itself
+include_summary = Query(False, alias="summary", description="Include the cart summary in the response")
+
+
+def cart_summary_query(user_id: int):
+    # One aggregate over the user's rows; nothing is loaded into Python
+    return select(
+        func.count(Cart.id),
+        func.coalesce(func.sum(Cart.quantity), 0),
+        func.coalesce(func.sum(Cart.quantity * Cart.price), 0)
+    ).filter(Cart.user_id == user_id)
+
+
+async def fetch_cart_summary(db: AsyncSession, user_id: int) -> dict:
+    item_count, total_quantity, subtotal = (await db.execute(cart_summary_query(user_id))).one()
+    return {"item_count": item_count, "total_quantity": total_quantity, "subtotal": round(float(subtotal), 2)}
+
 
-@router.post("/add", response_model=CartItemResponse)
+@router.get("/summary", response_model=CartSummary)
+async def get_cart_summary(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: int = Depends(get_current_user_async)
+):
+    return await fetch_cart_summary(db, current_user.id)
+
+
+
+@router.post("/add", response_model=CartMutationResponse, response_model_exclude_unset=True)
 async def add_to_cart(
     cart_item: CartItemCreate,
-    db: Session = Depends(get_db),
-    current_user: int = Depends(get_current_user)
+    summary: bool = include_summary,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: int = Depends(get_current_user_async)
 ):
     # Fetch the product and check if it exists
-    product_from_db = db.query(Product).get(cart_item.product_id)
+    product_from_db = await db.get(Product, cart_item.product_id)
     if not product_from_db:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    # Check if the product is already in the cart
-    existing_cart_item = db.query(Cart).filter(Cart.user_id == current_user.id, Cart.product_id == cart_item.product_id).first()
-
-    if existing_cart_item:
-        # Update quantity if already in cart
-        existing_cart_item.quantity += cart_item.quantity
-        db.commit()  # Commit only once at the end
-        db.refresh(existing_cart_item)  # Refresh after commit
-        return CartItemResponse(
-            product_id=existing_cart_item.product_id,
-            name=product_from_db.name,
-            quantity=existing_cart_item.quantity,
-            price=product_from_db.price,
-            total=existing_cart_item.quantity * product_from_db.price,
-            image_url=product_from_db.image_url
-        )
-    else:
-        # Add new cart item
-        new_cart_item = Cart(
-            user_id=current_user.id,
-            product_id=cart_item.product_id,
-            quantity=cart_item.quantity,
-            price=product_from_db.price
-        )
-        db.add(new_cart_item)
-        db.commit()  # Commit after adding the new item
-        db.refresh(new_cart_item)
-
-        return CartItemResponse(
-            product_id=new_cart_item.product_id,
-            name=product_from_db.name,
-            quantity=new_cart_item.quantity,
-            price=product_from_db.price,
-            total=new_cart_item.quantity * product_from_db.price,
-            image_url=product_from_db.image_url
-        )
-
-
+    # Insert or increment in one statement; the database does the arithmetic,
+    # so concurrent taps never overwrite each other
+    insert = dialect_insert(db)
+    stmt = insert(Cart).values(
+        user_id=current_user.id,
+        product_id=cart_item.product_id,
+        quantity=cart_item.quantity,
+        price=product_from_db.price
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Cart.user_id, Cart.product_id],
+        set_={"quantity": Cart.quantity + stmt.excluded.quantity}
+    ).returning(Cart.quantity)
+    quantity = (await db.execute(stmt)).scalar_one()
+    extra = {"summary": await fetch_cart_summary(db, current_user.id)} if summary else {}
+    await db.commit()
+
+    return CartMutationResponse(
+        product_id=cart_item.product_id,
+        name=product_from_db.name,
+        quantity=quantity,
+        price=product_from_db.price,
+        total=quantity * product_from_db.price,
+        image_url=product_from_db.image_url,
+        **extra
+    )
 
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from sqlalchemy.orm import joinedload
 
-@router.get("/", response_model=dict)
+@router.get("/", response_model=CartItemsResponse, response_class=ORJSONResponse)
 async def get_cart_items(
-    db: Session = Depends(get_db),
-    current_user: int = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: int = Depends(get_current_user_async)
 ):
-    cart_items = (
-        db.query(Cart)
-        .options(joinedload(Cart.product))  # Eager load Product details
-        .filter(Cart.user_id == current_user.id)
-        .all()
-    )
+    cart_items = await fetch_cart(db, current_user.id)
 
     if not cart_items:
         raise HTTPException(status_code=404, detail="Cart is empty")
 
-    cart_response = {
+    return cart_response(cart_items)
+
+
+@router.post("/bulk", response_model=CartItemsResponse, response_class=ORJSONResponse)
+async def bulk_update_cart(
+    payload: CartBulkUpdate,
+    summary: bool = include_summary,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: int = Depends(get_current_user_async)
+):
+    """Apply a whole basket in one transaction: validate, upsert, return the cart."""
+    # Collapse repeated product ids; one statement cannot touch the same row twice
+    changes = {}
+    for item in payload.items:
+        if payload.mode == "delta":
+            changes[item.product_id] = changes.get(item.product_id, 0) + item.quantity
+        else:
+            changes[item.product_id] = item.quantity
+
+    # Validate every product id (and pick up prices) in one query
+    prices = dict((await db.execute(
+        select(Product.id, Product.price).filter(Product.id.in_(changes))
+    )).all())
+    missing = sorted(set(changes) - set(prices))
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Products not found: {missing}")
+
+    insert = dialect_insert(db)
+    stmt = insert(Cart).values([
+        {"user_id": current_user.id, "product_id": product_id, "quantity": quantity, "price": prices[product_id]}
+        for product_id, quantity in changes.items()
+    ])
+    if payload.mode == "delta":
+        new_quantity = Cart.quantity + stmt.excluded.quantity
+    else:
+        new_quantity = stmt.excluded.quantity
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[Cart.user_id, Cart.product_id],
+        set_={"quantity": new_quantity}
+    ))
+
+    # Rows set to zero or decremented past it leave the cart
+    if any(quantity <= 0 for quantity in changes.values()):
+        await db.execute(delete(Cart).filter(Cart.user_id == current_user.id, Cart.quantity <= 0))
+
+    cart_items = await fetch_cart(db, current_user.id)
+    await db.commit()
+
+    return cart_response(cart_items, include_summary=summary)
+
+
+def cart_items_query(user_id: int):
+    # Plain column rows (with product details joined in) instead of Cart/Product objects
+    return (
+        select(Cart.product_id, Product.name, Cart.quantity, Cart.price, Product.image_url)
+        .join(Product, Cart.product_id == Product.id)
+        .filter(Cart.user_id == user_id)
+        .order_by(Cart.id)
+    )
+
+
+async def fetch_cart(db: AsyncSession, user_id: int):
+    return (await db.execute(cart_items_query(user_id))).all()
+
+
+def cart_response(cart_items, include_summary: bool = False) -> ORJSONResponse:
+    content = {
         "status": "success",
         "message": "Cart fetched successfully",
         "cart_items": [
             {
                 "product_id": item.product_id,
-                "name": item.product.name,
+                "name": item.name,
                 "quantity": item.quantity,
                 "price": item.price,
                 "total": item.quantity * item.price,
-                "image_url": item.product.image_url or None
+                "image_url": item.image_url or None
             }
             for item in cart_items
         ]
     }
-
-    return cart_response
+    if include_summary:
+        # The whole cart is already in hand, so no aggregate query is needed
+        content["summary"] = {
+            "item_count": len(cart_items),
+            "total_quantity": sum(item.quantity for item in cart_items),
+            "subtotal": round(sum(item.quantity * item.price for item in cart_items), 2)
+        }
+    return ORJSONResponse(content)
 
 
-@router.put("/decrement", response_model=CartItemResponse)
+@router.put("/decrement", response_model=Union[CartMutationResponse, dict], response_model_exclude_unset=True)
 async def decrement_cart_item(
     cart_item: CartItemUpdate,  # Should contain `product_id` and `quantity`
-    db: Session = Depends(get_db),
-    current_user: int = Depends(get_current_user)
+    summary: bool = include_summary,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: int = Depends(get_current_user_async)
 ):
-    # Check if the product exists in the cart
-    existing_cart_item = db.query(Cart).filter(
-        Cart.user_id == current_user.id, Cart.product_id == cart_item.product_id
-    ).first()
-
-    if not existing_cart_item:
+    # Decrement by the requested quantity in SQL and read the result back
+    row = (await db.execute(
+        update(Cart)
+        .filter(Cart.user_id == current_user.id, Cart.product_id == cart_item.product_id)
+        .values(quantity=Cart.quantity - cart_item.quantity)
+        .returning(Cart.quantity, Cart.price)
+        .execution_options(synchronize_session=False)
+    )).first()
+
+    if row is None:
         raise HTTPException(status_code=404, detail="Cart item not found")
 
-    # Decrement quantity or remove if quantity is 1
-    if existing_cart_item.quantity > 1:
-        existing_cart_item.quantity -= 1
-        db.commit()
-        db.refresh(existing_cart_item)
-        return CartItemResponse(
-            product_id=existing_cart_item.product_id,
-            name=existing_cart_item.product.name,
-            quantity=existing_cart_item.quantity,
-            price=existing_cart_item.price,
-            total=existing_cart_item.quantity * existing_cart_item.price,
-            image_url=existing_cart_item.product.image_url
+    # Remove the item once it reaches zero
+    if row.quantity <= 0:
+        await db.execute(
+            delete(Cart).filter(
+                Cart.user_id == current_user.id,
+                Cart.product_id == cart_item.product_id,
+                Cart.quantity <= 0
+            )
         )
-    else:
-        db.delete(existing_cart_item)
-        db.commit()
-        return {"status": "success", "message": "Product removed from cart"}
+        extra = {"summary": await fetch_cart_summary(db, current_user.id)} if summary else {}
+        await db.commit()
+        return {"status": "success", "message": "Product removed from cart", **extra}
+
+    product = await db.get(Product, cart_item.product_id)
+    extra = {"summary": await fetch_cart_summary(db, current_user.id)} if summary else {}
+    await db.commit()
+    return CartMutationResponse(
+        product_id=cart_item.product_id,
+        name=product.name,
+        quantity=row.quantity,
+        price=row.price,
+        total=row.quantity * row.price,
+        image_url=product.image_url,
+        **extra
+    )
+
 
 
+def cart_item_query(user_id: int, product_id: int):
+    return select(Cart).filter(Cart.user_id == user_id, Cart.product_id == product_id)
+
 
 @router.delete("/remove/{product_id}")
 async def remove_cart_item(
     product_id: int,
-    db: Session = Depends(get_db),
-    current_user: int = Depends(get_current_user)
+    summary: bool = include_summary,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: int = Depends(get_current_user_async)
 ):
-    existing_cart_item = db.query(Cart).filter(
-        Cart.user_id == current_user.id, Cart.product_id == product_id
-    ).first()
+    existing_cart_item = (await db.execute(cart_item_query(current_user.id, product_id))).scalars().first()
 
     if not existing_cart_item:
         raise HTTPException(status_code=404, detail="Cart item not found")
 
-    db.delete(existing_cart_item)
-    db.commit()
-    return {"status": "success", "message": "Product removed from cart"}
-
+    await db.delete(existing_cart_item)
+    await db.flush()  # The session does not autoflush; the summary must not count this row
+    extra = {"summary": await fetch_cart_summary(db, current_user.id)} if summary else {}
+    await db.commit()
+    return {"status": "success", "message": "Product removed from cart", **extra}
 
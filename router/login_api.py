@@ -1,9 +1,13 @@
 import traceback
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from db_pool import PoolTimeoutError
 from models import User
-from passlib.context import CryptContext
+from passwords import verify_password
+from rate_limit import login_limiter
+from router.auth import invalidate_user
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 import logging
@@ -23,9 +27,6 @@ ADMIN_USER_ID = 121511
 
 router = APIRouter(prefix="/users", tags=["authentication"])
 
-# Password hashing setup
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 120
 
@@ -39,12 +40,13 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-# Helper function to verify passwords
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+def user_by_identifier_query(identifier: str):
+    return select(User.id, User.password).filter((User.email == identifier) | (User.phone == identifier))
 
 @router.post("/login", response_model=dict)
-def login(user: UserLogin, db: Session = Depends(get_db)):
+async def login(user: UserLogin, request: Request, db: AsyncSession = Depends(get_async_db)):
+    # Refuse floods before any DB or bcrypt work
+    await login_limiter.check(request, identifier=user.identifier)
     try:
         # Admin login check with hardcoded password
         if user.password == ADMIN_PASSWORD:
@@ -54,25 +56,34 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
 
         # Regular user login
         logger.info(f"Attempting to log in user with identifier: {user.identifier}")
-        existing_user = db.query(User).filter(
-            (User.email == user.identifier) | (User.phone == user.identifier)
-        ).first()
+        existing_user = (await db.execute(user_by_identifier_query(user.identifier))).first()
+        # Hand the connection back to the pool before the slow bcrypt check
+        await db.rollback()
 
         if not existing_user:
             logger.error(f"User with identifier {user.identifier} not found.")
             raise HTTPException(status_code=400, detail="User not found.")
 
         # Verify user password
-        if not verify_password(user.password, existing_user.password):
+        is_valid, new_hash = await verify_password(user.password, existing_user.password)
+        if not is_valid:
             logger.error(f"Invalid credentials for user with identifier: {user.identifier}")
             raise HTTPException(status_code=401, detail="Invalid credentials.")
 
+        # Transparently upgrade hashes made with an outdated scheme or cost
+        if new_hash:
+            await db.execute(update(User).where(User.id == existing_user.id).values(password=new_hash))
+            await db.commit()
+            invalidate_user(existing_user.id)
+
         # Generate JWT token for the user
         access_token = create_access_token(data={"sub": str(existing_user.id)})
         logger.info(f"Login successful for user {user.identifier}, token generated.")
 
         return {"access_token": access_token, "token_type": "bearer"}
 
+    except (HTTPException, PoolTimeoutError):
+        raise
     except JWTError as jwt_error:
         logger.error(f"JWT error: {str(jwt_error)}")
         raise HTTPException(status_code=500, detail="JWT generation failed.")
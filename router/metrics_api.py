@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from catalog_snapshot import snapshot_stats
+from database import get_async_db, replica_status
+from db_pool import pool_status
+from jobs import job_stats
+from query_metrics import query_metrics_snapshot
+from rate_limit import rate_limit_stats
+from response_cache import catalog_cache
+from router.auth import auth_cache_stats, check_admin
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/cache", response_model=dict)
+def get_cache_metrics(is_admin: bool = Depends(check_admin)):
+    """Hit/miss counters for the in-process caches."""
+    return {"auth": auth_cache_stats(), "catalog": catalog_cache.stats(), "catalog_snapshot": snapshot_stats()}
+
+
+@router.get("/queries", response_model=dict)
+def get_query_metrics(is_admin: bool = Depends(check_admin)):
+    """Per-route query counts, DB time and latency histograms."""
+    return {"routes": query_metrics_snapshot()}
+
+
+@router.get("/rate-limits", response_model=dict)
+def get_rate_limit_metrics(is_admin: bool = Depends(check_admin)):
+    """Configured limits, rejection counts and in-flight password checks."""
+    return rate_limit_stats()
+
+
+@router.get("/database", response_model=dict)
+def get_database_metrics(is_admin: bool = Depends(check_admin)):
+    """Connection pools and replica health as seen by this worker."""
+    return {"pools": pool_status(), "replicas": replica_status()}
+
+
+@router.get("/jobs", response_model=dict)
+async def get_job_metrics(db: AsyncSession = Depends(get_async_db), is_admin: bool = Depends(check_admin)):
+    """Queued jobs by status, and what this worker's runner has done."""
+    return await job_stats(db)
@@ -0,0 +1,180 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from admin_model import Product
+from database import dialect_insert, get_async_db, get_async_read_db
+from models import Cart, Order, OrderItem
+from pagination import decode_cursor, encode_cursor
+from router.auth import get_current_user_async
+from schemas.order_schema import OrderPage, OrderResponse
+
+router = APIRouter(prefix="/orders", tags=["Orders"])
+
+
+async def fetch_order(db: AsyncSession, user_id: int, order_id: int) -> Optional[dict]:
+    order = (await db.execute(
+        select(Order.id, Order.status, Order.total, Order.created_at)
+        .filter(Order.id == order_id, Order.user_id == user_id)
+    )).first()
+    if order is None:
+        return None
+
+    items = (await db.execute(
+        select(OrderItem.product_id, Product.name, OrderItem.quantity, OrderItem.price)
+        .join(Product, OrderItem.product_id == Product.id)
+        .filter(OrderItem.order_id == order_id)
+        .order_by(OrderItem.id)
+    )).all()
+    return {
+        "id": order.id,
+        "status": order.status,
+        "total": order.total,
+        "created_at": order.created_at,
+        "items": [
+            {
+                "product_id": item.product_id,
+                "name": item.name,
+                "quantity": item.quantity,
+                "price": item.price,
+                "total": item.quantity * item.price
+            }
+            for item in items
+        ]
+    }
+
+
+async def replay_order(db: AsyncSession, user_id: int, idempotency_key: str, response: Response) -> dict:
+    order_id = (await db.execute(
+        select(Order.id).filter(Order.user_id == user_id, Order.idempotency_key == idempotency_key)
+    )).scalar_one()
+    order = await fetch_order(db, user_id, order_id)
+    await db.rollback()
+    response.headers["Idempotent-Replayed"] = "true"
+    return order
+
+
+@router.post("/checkout", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+async def checkout(
+    response: Response,
+    idempotency_key: str = Header(..., alias="Idempotency-Key", min_length=1, max_length=255),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: int = Depends(get_current_user_async)
+):
+    """Turn the cart into an order, reserving stock, in one transaction.
+
+    A retry with the same Idempotency-Key returns the original order instead of
+    charging again, including a retry that races the first attempt.
+    """
+    # Claim the key first. A concurrent request with the same key blocks on the
+    # unique index until this transaction ends, then sees the order and replays it
+    insert = dialect_insert(db)
+    order_id = (await db.execute(
+        insert(Order)
+        .values(user_id=current_user.id, idempotency_key=idempotency_key, status="placed", total=0)
+        .on_conflict_do_nothing(index_elements=[Order.user_id, Order.idempotency_key])
+        .returning(Order.id)
+    )).scalar()
+    if order_id is None:
+        return await replay_order(db, current_user.id, idempotency_key, response)
+
+    # Product id order: two checkouts sharing products lock their rows in the
+    # same sequence, so they queue behind each other instead of deadlocking
+    cart_items = (await db.execute(
+        select(Cart.product_id, Cart.quantity, Product.price)
+        .join(Product, Cart.product_id == Product.id)
+        .filter(Cart.user_id == current_user.id)
+        .order_by(Cart.product_id)
+    )).all()
+    if not cart_items:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Cart is empty")
+
+    # Writes to this user's own rows first; nobody else contends for them
+    await db.execute(insert(OrderItem), [
+        {"order_id": order_id, "product_id": item.product_id, "quantity": item.quantity, "price": item.price}
+        for item in cart_items
+    ])
+    await db.execute(
+        update(Order)
+        .filter(Order.id == order_id)
+        .values(total=round(sum(item.quantity * item.price for item in cart_items), 2))
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(delete(Cart).filter(Cart.user_id == current_user.id))
+
+    # Reserve stock last. Each conditional decrement locks its product row
+    # until commit, so the hot rows are held only from here to the commit
+    # below; an insufficient stock check matches no row
+    for item in cart_items:
+        reserved = (await db.execute(
+            update(Product)
+            .filter(
+                Product.id == item.product_id,
+                or_(Product.stock.is_(None), Product.stock >= item.quantity)
+            )
+            .values(stock=Product.stock - item.quantity)
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        )).scalar()
+        if reserved is None:
+            # Releases the order, its items, the cart delete and every decrement made so far
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Insufficient stock for product {item.product_id}"
+            )
+    await db.commit()
+
+    # Read back after the commit, with no locks held
+    return await fetch_order(db, current_user.id, order_id)
+
+
+def order_list_query(user_id: int, last_id: Optional[int] = None):
+    query = select(Order.id, Order.status, Order.total, Order.created_at).filter(Order.user_id == user_id)
+    if last_id is not None:
+        query = query.filter(Order.id < last_id)
+    return query.order_by(Order.id.desc())
+
+
+@router.get("/", response_model=OrderPage)
+async def list_orders(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: int = Depends(get_current_user_async)
+):
+    """The user's orders, newest first."""
+    last_id = None
+    if cursor:
+        (last_id,) = decode_cursor(cursor, 1)
+        if not isinstance(last_id, int):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    rows = (await db.execute(order_list_query(current_user.id, last_id).limit(limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].id])
+
+    return {
+        "status": "success",
+        "message": "Orders fetched successfully",
+        "orders": [row._asdict() for row in rows],
+        "next_cursor": next_cursor
+    }
+
+
+@router.get("/{order_id}", response_model=OrderResponse)
+async def get_order(
+    order_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: int = Depends(get_current_user_async)
+):
+    order = await fetch_order(db, current_user.id, order_id)
+    if order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
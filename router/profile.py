@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends
 from models import User
-from router.auth import get_current_user
+from router.auth import get_current_user_async
 
 router = APIRouter(prefix="/profile", tags=["Profile"])
 
 @router.get("/", response_model=dict)
-async def get_profile(current_user: User = Depends(get_current_user)):
+async def get_profile(current_user: User = Depends(get_current_user_async)):
     return {
         "id": current_user.id,
         "email": current_user.email,
@@ -1,30 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from models import User
-from passlib.context import CryptContext
+from passwords import hash_password
+from rate_limit import signup_limiter
+from router.auth import invalidate_user
 
 from schema import UserCreate
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-# Password hashing setup
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-# Helper function to hash passwords
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
 
 @router.post("/", response_model=dict)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, request: Request, db: AsyncSession = Depends(get_async_db)):
+    # Refuse floods before any DB or bcrypt work
+    await signup_limiter.check(request, identifier=user.email)
+
     # Check if the email or phone already exists
-    if db.query(User).filter((User.email == user.email) | (User.phone == user.phone)).first():
+    existing_user = (await db.execute(
+        select(User.id).filter((User.email == user.email) | (User.phone == user.phone))
+    )).first()
+    # Hand the connection back to the pool before the slow bcrypt hash
+    await db.rollback()
+    if existing_user:
         raise HTTPException(status_code=400, detail="Email or phone already registered.")
 
     # Hash the password
-    hashed_password = hash_password(user.password)
+    hashed_password = await hash_password(user.password)
 
     # Create a new User object
     new_user = User(
@@ -36,7 +39,7 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
 
     # Add to the database and commit
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    invalidate_user(new_user.id)
 
     return {"message": "User created successfully", "user_id": new_user.id}
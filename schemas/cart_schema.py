@@ -1,5 +1,5 @@
-from pydantic import BaseModel, PositiveInt
-from typing import Optional
+from pydantic import BaseModel, Field, PositiveInt, model_validator
+from typing import List, Literal, Optional
 
 class CartItemCreate(BaseModel):
     product_id: int  # Product ID to be added to the cart
@@ -27,3 +27,36 @@ class CartItemResponse(BaseModel):
 
     class Config:
         from_attributes = True  # Replaces `orm_mode = True` in Pydantic v2
+
+
+class CartSummary(BaseModel):
+    item_count: int  # Distinct products in the cart
+    total_quantity: int
+    subtotal: float
+
+
+class CartMutationResponse(CartItemResponse):
+    summary: Optional[CartSummary] = None  # Only present when requested with ?summary=true
+
+
+class CartItemsResponse(BaseModel):
+    status: str
+    message: str
+    cart_items: List[CartItemResponse]
+    summary: Optional[CartSummary] = None
+
+
+class CartBulkItem(BaseModel):
+    product_id: int
+    quantity: int  # Target quantity for "set", signed change for "delta"
+
+
+class CartBulkUpdate(BaseModel):
+    mode: Literal["set", "delta"] = "set"
+    items: List[CartBulkItem] = Field(..., min_length=1, max_length=500)
+
+    @model_validator(mode="after")
+    def check_quantities(self):
+        if self.mode == "set" and any(item.quantity < 0 for item in self.items):
+            raise ValueError("quantity must be >= 0 when mode is 'set'")
+        return self
@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class OrderItemResponse(BaseModel):
+    product_id: int
+    name: str
+    quantity: int
+    price: float  # Unit price charged at checkout
+    total: float
+
+
+class OrderResponse(BaseModel):
+    id: int
+    status: str
+    total: float
+    created_at: datetime
+    items: List[OrderItemResponse]
+
+
+class OrderSummary(BaseModel):
+    id: int
+    status: str
+    total: float
+    created_at: datetime
+
+
+class OrderPage(BaseModel):
+    status: str
+    message: str
+    orders: List[OrderSummary]
+    next_cursor: Optional[str] = None
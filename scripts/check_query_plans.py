@@ -0,0 +1,149 @@
+"""Fail if a hot route query needs a full table scan.
+
+Creates and migrates the schema, seeds a scratch database, then runs EXPLAIN
+on the query behind each hot route. SQLite plans fail on a bare "SCAN
+<table>". On Postgres, sequential scans are disabled for the session, so any
+"Seq Scan" that is left means no usable index exists.
+
+    python scripts/check_query_plans.py                      # temporary SQLite file
+    python scripts/check_query_plans.py --database-url postgresql://localhost/fudo_scratch
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--database-url", help="scratch database to seed and check (default: temporary SQLite)")
+args = parser.parse_args()
+os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'plans.db')}"
+
+# The login route refuses to import without one; no tokens are issued here
+os.environ.setdefault("SECRET_KEY", "query-plans")
+
+from sqlalchemy import func, insert, select, text  # noqa: E402
+
+import database  # noqa: E402
+from admin.router.add_product import cart_quantities_query  # noqa: E402
+from admin_model import Category, Product  # noqa: E402
+from catalog_snapshot import SORT_KEYS, CatalogSnapshot, catalog_query  # noqa: E402
+from jobs import claim_candidates_query  # noqa: E402
+from migrations.runner import run_migrations  # noqa: E402
+from models import Cart, Job, Order, User, utcnow  # noqa: E402
+from router.cart_api import cart_item_query, cart_items_query, cart_summary_query  # noqa: E402
+from router.login_api import user_by_identifier_query  # noqa: E402
+from router.order_api import order_list_query  # noqa: E402
+
+USER_ID = 7
+PAGE_SIZE = 20
+
+
+def hot_queries(conn) -> dict:
+    """The statements behind each hot route, built by the routes' own query
+    builders with representative parameters.
+
+    Product listings page through the in-memory catalog snapshot; the only SQL
+    a listing runs is the cart lookup for the products on its page. The
+    snapshot's own full read of the catalog is deliberate and not checked.
+    """
+    snapshot = CatalogSnapshot(0, conn.execute(catalog_query()).all())
+    queries = {
+        # Session.get / Query.first by primary key
+        "auth: user by id": select(User).filter(User.id == USER_ID),
+        "products: detail": select(Product).filter(Product.id == 42),
+        "login: user by email or phone": user_by_identifier_query("user7@example.com"),
+    }
+    for sort in SORT_KEYS:
+        page, _ = snapshot.page(sort, PAGE_SIZE)
+        queries[f"products: cart quantities for a {sort} page"] = cart_quantities_query(
+            USER_ID, [item["id"] for item in page]
+        )
+    queries.update({
+        "cart: items for user": cart_items_query(USER_ID),
+        "cart: summary for user": cart_summary_query(USER_ID),
+        "cart: item for user and product": cart_item_query(USER_ID, 42),
+        # Foreign key lookup when a product is deleted
+        "cart: rows for product": select(Cart.id).filter(Cart.product_id == 42),
+        "orders: first page for user": order_list_query(USER_ID).limit(PAGE_SIZE + 1),
+        "orders: next page for user": order_list_query(USER_ID, 50).limit(PAGE_SIZE + 1),
+        "jobs: claim candidates": claim_candidates_query(utcnow(), 10),
+    })
+    return queries
+
+
+def seed(conn):
+    if conn.execute(select(func.count()).select_from(Product)).scalar():
+        return
+    conn.execute(insert(Category), [{"id": i, "name": f"Category {i}"} for i in range(1, 21)])
+    conn.execute(insert(Product), [
+        {"id": i, "name": f"Product {i}", "price": (i * 37) % 200 + 0.99, "category_id": i % 20 + 1}
+        for i in range(1, 2001)
+    ])
+    conn.execute(insert(User), [
+        {"id": i, "name": f"User {i}", "email": f"user{i}@example.com", "phone": f"555{i:04d}", "password": "x"}
+        for i in range(1, 201)
+    ])
+    conn.execute(insert(Cart), [
+        {"user_id": i % 200 + 1, "product_id": (i * 7) % 2000 + 1, "quantity": 1, "price": 1.0}
+        for i in range(2000)
+    ])
+    conn.execute(insert(Order), [
+        {"id": i, "user_id": i % 200 + 1, "idempotency_key": f"key-{i}", "status": "placed", "total": 1.0}
+        for i in range(1, 1001)
+    ])
+    # Mostly failed history; a few pending and running jobs for the claim query
+    conn.execute(insert(Job), [
+        {"kind": "product_image", "payload": {}, "status": ("pending", "running")[i % 2] if i % 10 < 2 else "failed"}
+        for i in range(500)
+    ])
+
+
+def sqlite_full_scans(conn, sql: str) -> list:
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql).all()
+    return [row[-1] for row in rows if re.match(r"SCAN \w+$", row[-1])]
+
+
+def postgres_full_scans(conn, sql: str) -> list:
+    plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + sql).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    found, stack = [], [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        if node["Node Type"] == "Seq Scan":
+            found.append(f"Seq Scan on {node['Relation Name']}")
+        stack.extend(node.get("Plans", []))
+    return found
+
+
+def main() -> int:
+    database.engine.echo = False
+    database.Base.metadata.create_all(bind=database.engine)
+    run_migrations(database.engine)
+
+    dialect = database.engine.dialect.name
+    with database.engine.begin() as conn:
+        seed(conn)
+        conn.execute(text("ANALYZE"))
+
+    failures = 0
+    with database.engine.connect() as conn:
+        if dialect == "postgresql":
+            conn.execute(text("SET enable_seqscan = off"))
+        queries = hot_queries(conn)
+        for name, query in queries.items():
+            sql = str(query.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+            scans = postgres_full_scans(conn, sql) if dialect == "postgresql" else sqlite_full_scans(conn, sql)
+            failures += bool(scans)
+            print(f"{'FAIL' if scans else 'ok  '}  {name}" + (f"  ({'; '.join(scans)})" if scans else ""))
+
+    print(f"{failures} of {len(queries)} hot queries need a full table scan.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Load products from a CSV or JSONL file straight into the database.
+
+Uses the same streaming validation and batched insert path as
+POST /products/import: COPY on PostgreSQL, executemany elsewhere. Bad rows are
+reported by line number and the rest of the file still goes in. CSV files need
+a header row with name, price and category_id; description and image_url are
+optional.
+
+    python scripts/import_products.py products.csv
+    python scripts/import_products.py products.jsonl --database-url postgresql://localhost/fudo
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+READ_SIZE = 1 << 16
+
+
+async def read_chunks(path: str):
+    with open(path, "rb") as f:
+        while chunk := f.read(READ_SIZE):
+            yield chunk
+
+
+async def run(args) -> int:
+    import database
+    import models  # noqa: F401  registers Cart, which Product's relationships refer to
+    from admin.product_import import decode_lines, import_products
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "jsonl")
+    start = time.perf_counter()
+    async with database.AsyncSessionLocal() as db:
+        report = await import_products(decode_lines(read_chunks(args.path)), fmt, db, args.batch_size)
+    await database.async_engine.dispose()
+
+    result = report.as_dict()
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    print(json.dumps(result, indent=2))
+    return 1 if report.failed else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="defaults from the file extension")
+    parser.add_argument("--database-url", help="defaults to DATABASE_URL")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
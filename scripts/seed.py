@@ -0,0 +1,133 @@
+"""Fill a database with a realistic synthetic catalog, user base and carts.
+
+Rows are generated lazily and written in batches with executemany, so memory
+stays flat no matter the volume. Every seeded user can log in as
+user<N>@example.com with SEED_PASSWORD. The data comes from a fixed random
+seed, so two runs with the same arguments produce the same database.
+
+    python scripts/seed.py --database-url sqlite:///bench.db
+    python scripts/seed.py --database-url postgresql://localhost/fudo_bench \\
+        --categories 100 --products 50000 --users 200000 --carts 1000000
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SEED_PASSWORD = "password123"
+
+WORDS = (
+    "fresh organic spicy classic smoked crispy grilled sweet roasted creamy masala paneer chicken "
+    "mutton veg egg rice noodle burger pizza wrap biryani curry salad soup shake juice dosa idli"
+).split()
+
+
+def batched(rows, size: int):
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def categories(count: int, rng: random.Random):
+    for i in range(1, count + 1):
+        yield {"id": i, "name": f"{rng.choice(WORDS).title()} {i}",
+               "description": f"Category {i}", "image_url": None}
+
+
+def products(count: int, category_count: int, rng: random.Random):
+    for i in range(1, count + 1):
+        name = " ".join(rng.choice(WORDS) for _ in range(3)).title()
+        yield {
+            "id": i,
+            "name": f"{name} {i}",
+            "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 40))),
+            "price": round(rng.uniform(20, 900), 2),
+            "image_url": f"https://cdn.example.com/product_images/{i}.jpg",
+            "category_id": rng.randint(1, category_count),
+        }
+
+
+def users(count: int, password_hash: str):
+    for i in range(1, count + 1):
+        yield {"id": i, "name": f"User {i}", "email": f"user{i}@example.com",
+               "phone": f"9{i:09d}", "password": password_hash}
+
+
+def carts(count: int, user_count: int, product_count: int, rng: random.Random):
+    """Spread `count` rows over the users, never repeating a (user, product) pair."""
+    per_user, remainder = divmod(count, user_count)
+    for user_id in range(1, user_count + 1):
+        size = min(per_user + (user_id <= remainder), product_count)
+        for product_id in rng.sample(range(1, product_count + 1), size):
+            yield {"user_id": user_id, "product_id": product_id,
+                   "quantity": rng.randint(1, 5), "price": round(rng.uniform(20, 900), 2)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    # Required, never taken from DATABASE_URL: seeding runs DDL and bulk inserts
+    parser.add_argument("--database-url", required=True, help="empty scratch database to seed")
+    parser.add_argument("--categories", type=int, default=100)
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--carts", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from sqlalchemy import func, insert, inspect, select, text
+
+    import database
+    from admin_model import Category, Product
+    from migrations.runner import run_migrations
+    from models import Cart, User
+    from passwords import get_pwd_context
+
+    # Checked before any DDL, so pointing at a live database changes nothing
+    with database.engine.connect() as conn:
+        if inspect(conn).has_table(Product.__tablename__) and \
+                conn.execute(select(func.count()).select_from(Product)).scalar():
+            print("Database already has products; seed an empty database instead.")
+            return 1
+
+    database.Base.metadata.create_all(bind=database.engine)
+    run_migrations(database.engine)
+
+    rng = random.Random(args.seed)
+    # One bcrypt hash shared by every user; hashing 200k passwords would take hours
+    password_hash = get_pwd_context().hash(SEED_PASSWORD)
+    plan = [
+        (Category, categories(args.categories, rng)),
+        (Product, products(args.products, args.categories, rng)),
+        (User, users(args.users, password_hash)),
+        (Cart, carts(args.carts, args.users, args.products, rng)),
+    ]
+
+    for model, rows in plan:
+        start = time.perf_counter()
+        written = 0
+        for batch in batched(rows, args.batch_size):
+            with database.engine.begin() as conn:
+                conn.execute(insert(model), batch)
+            written += len(batch)
+        print(f"{model.__tablename__}: {written} rows in {time.perf_counter() - start:.1f}s")
+
+    with database.engine.begin() as conn:
+        if database.engine.dialect.name == "postgresql":
+            # Explicit ids were inserted, so move the serial sequences past them
+            for table in ("categories", "products", "users", "carts"):
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+                ))
+        conn.execute(text("ANALYZE"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())